@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 from module.data_loader import DataLoader
-from page.session import init_session
-from page.univariate import page_univariate_eda
+from module.dataset_cache import DatasetCache
+from module.column_profile import ProfileStore
+from page.session import init_session, reset_session
+from page.background import leave_page
+from page.univariate import page_univariate_eda, precompute_univariate
 from page.bivariate import page_bivariate_eda
 from page.feature_engineering import page_feature_engineering
 
@@ -33,35 +36,152 @@ def upload_data():
     '''
     st.write("### Upload Data")
     uploaded_file = st.file_uploader(
-        "Please upload your data here. We accept tabular **CSV files** only.", 
+        "Please upload your data here. We accept tabular **CSV** (optionally gzip/zstd compressed), **Parquet** and **Feather/Arrow** files.",
         accept_multiple_files=False,
-        type = ['csv']
+        type = ['csv', 'gz', 'zst', 'parquet', 'pq', 'feather', 'arrow', 'ipc']
     )
-    data = preview(uploaded_file)
+    columns = select_columns(uploaded_file)
+    if columns is None:
+        return
+    options = st.session_state["upload_options"].get(uploaded_file.file_id, {})
+    data = preview(uploaded_file, columns, options)
     if data is not None:
         init_session(data)
+        precompute_univariate(st.session_state.data)
 
-@st.cache_data
-def load_and_cast(file) -> pd.DataFrame:
-    df = pd.read_csv(file)
-    loader = DataLoader(df)
-    loader.cast_object()
-    return loader.data
+def select_columns(uploaded_file):
+    '''
+    Scan the header of the upload and let the user pick the columns to load.
+    Returns the selected columns once confirmed, otherwise None.
+    '''
+    if uploaded_file is None:
+        return None
+    file_format, _ = DataLoader.detect_format(uploaded_file.name)
+    if file_format is None:
+        st.warning("Invalide file type. Please upload a CSV, Parquet or Feather file.")
+        return None
 
-def preview(uploaded_file):
-    if uploaded_file is not None:
-        if uploaded_file.type == "text/csv":
-            try:
-                data = load_and_cast(uploaded_file)
-                st.success("Data uploaded successfully!")
-                st.write("### Data Preview")      
-                st.dataframe(data.head(5))
-                return data
-            except:
-                st.error("Error loading data. Please check your file and try again.")
-        else:
-            st.warning("Invalide file type. Please upload a CSV file.")
+    # remember the scan and the selection of each upload across reruns
+    scans = st.session_state.setdefault("upload_scans", {})
+    selections = st.session_state.setdefault("upload_columns", {})
+    options = st.session_state.setdefault("upload_options", {})
+    if uploaded_file.file_id not in scans:
+        try:
+            scans[uploaded_file.file_id] = DataLoader(None).scan_header(uploaded_file)
+        except Exception:
+            st.error("Error reading the file header. Please check your file and try again.")
             return None
+    scan = scans[uploaded_file.file_id]
+
+    with st.form("column_selection"):
+        st.write("Select the columns to load.")
+        edited = st.data_editor(
+            scan.assign(load=True), disabled=["column", "type"],
+            hide_index=True, use_container_width=True,
+        )
+        encode_categories = st.checkbox(
+            "Store repetitive text columns as categories",
+            value=True,
+            help="Keeps each distinct text once and the rows as integer codes, which saves memory and speeds up counting.",
+        )
+        downcast = st.checkbox(
+            "Store numbers in the smallest type that fits",
+            value=False,
+            help="Integers get the narrowest width for their range, and whole numbers with missing values stay integers.",
+        )
+        float32 = st.checkbox(
+            "Allow 32-bit floats",
+            value=False,
+            help=f"Only for columns where no value changes by more than {FLOAT32_TOLERANCE:g} relative. Needs the option above.",
+        )
+        if st.form_submit_button("Load data", use_container_width=True):
+            selected = edited.loc[edited["load"], "column"].tolist()
+            if not selected:
+                st.warning("Select at least one column.")
+                return None
+            selections[uploaded_file.file_id] = selected
+            options[uploaded_file.file_id] = {
+                "encode_categories": encode_categories,
+                "downcast": downcast,
+                "float_tolerance": FLOAT32_TOLERANCE if downcast and float32 else None,
+            }
+            reset_session()
+
+    return selections.get(uploaded_file.file_id)
+
+# uploads larger than this are parsed chunk by chunk
+CHUNKED_LOAD_BYTES = 200 * 1024 * 1024
+# largest relative error accepted when storing a float column as float32
+FLOAT32_TOLERANCE = 1e-6
+
+@st.cache_resource
+def get_dataset_cache() -> DatasetCache:
+    return DatasetCache()
+
+def load_and_cast(file, columns=None, options=None, progress=None) -> pd.DataFrame:
+    '''
+    Load and cast an upload. `options` are the DataLoader keyword arguments.
+    '''
+    options = options or {}
+    loader = DataLoader(None, **options)
+    # remember the memory report of each load so that reruns can show it again
+    reports = st.session_state.setdefault("memory_reports", {})
+    report_key = (file.file_id, tuple(columns or ()), tuple(sorted(options.items())))
+
+    cache = get_dataset_cache()
+    # remember the hash of each upload so that reruns do not read the file again
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    if file.file_id not in hashes:
+        hashes[file.file_id] = DatasetCache.content_hash(file)
+    key = cache.key(hashes[file.file_id], columns=tuple(columns or ()), **options)
+    # the memory report is cached next to the data, a hit does not encode or downcast again
+    report_cache_key = cache.key(hashes[file.file_id], columns=tuple(columns or ()), memory_report=True, **options)
+
+    data = cache.get(key)
+    if data is not None:
+        if report_key not in reports:
+            reports[report_key] = cache.get(report_cache_key)
+        return data
+
+    file_format, _ = DataLoader.detect_format(file.name)
+    if file_format == "csv" and file.size > CHUNKED_LOAD_BYTES:
+        data = loader.load_data_chunked(file, columns, progress=progress)
+        ProfileStore.of(data).set_sketches(loader.sketches)
+    else:
+        data = loader.load_data(file, columns)
+    reports[report_key] = loader.memory_report
+    cache.put(key, data)
+    if loader.memory_report is not None:
+        cache.put(report_cache_key, loader.memory_report)
+    return data
+
+def show_memory_report(report):
+    '''
+    Show the memory of every column before and after encoding and downcasting.
+    '''
+    if report is None:
+        return
+    before, after = report["bytes before"].sum(), report["bytes after"].sum()
+    with st.expander(f"Memory: {before / 1024 ** 2:.1f} MB as parsed, {after / 1024 ** 2:.1f} MB stored"):
+        st.dataframe(report.assign(**{
+            "MB before": report["bytes before"] / 1024 ** 2,
+            "MB after": report["bytes after"] / 1024 ** 2,
+        })[["column", "type", "MB before", "MB after"]].round(2), hide_index=True, use_container_width=True)
+
+def preview(uploaded_file, columns=None, options=None):
+    if uploaded_file is not None:
+        try:
+            progress = st.progress(0.0, text="Loading data...")
+            data = load_and_cast(uploaded_file, columns, options, progress=progress.progress)
+            progress.empty()
+            st.success("Data uploaded successfully!")
+            report_key = (uploaded_file.file_id, tuple(columns or ()), tuple(sorted((options or {}).items())))
+            show_memory_report(st.session_state["memory_reports"].get(report_key))
+            st.write("### Data Preview")      
+            st.dataframe(data.head(5))
+            return data
+        except:
+            st.error("Error loading data. Please check your file and try again.")
 
 page_names_to_funcs = {
     "-": page_intro,
@@ -71,4 +191,5 @@ page_names_to_funcs = {
 }
 
 demo_name = st.sidebar.selectbox("Function Pages", page_names_to_funcs.keys())
+leave_page(demo_name)
 page_names_to_funcs[demo_name]()
\ No newline at end of file
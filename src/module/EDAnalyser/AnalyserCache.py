@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+class AnalyserCache:
+    '''
+    Thread-safe LRU cache of analysers shared by every session of the server.
+
+    Entries are scoped per dataset and keyed by the content fingerprints of the
+    columns they analyse, so a changed column never returns a stale analyser.
+    The least recently used entries are evicted once the data held by the
+    cached analysers exceeds `max_bytes`.
+    '''
+    def __init__(self, max_bytes=1024 ** 3):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # (scope, key) -> (analyser, columns, nbytes)
+        self._total = 0
+        self._lock = threading.RLock()
+
+    def get(self, scope, key):
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                return None
+            self._entries.move_to_end((scope, key))
+            return entry[0]
+
+    def put(self, scope, key, analyser, columns):
+        nbytes = self._analyser_bytes(analyser)
+        with self._lock:
+            self._pop((scope, key))
+            self._entries[(scope, key)] = (analyser, frozenset(columns), nbytes)
+            self._total += nbytes
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, scope, columns=None):
+        '''
+        Drop the analysers of a scope that use any of `columns`, or all of them if None.
+        '''
+        columns = None if columns is None else set(columns)
+        with self._lock:
+            for entry_key, (_, used, _) in list(self._entries.items()):
+                if entry_key[0] == scope and (columns is None or used & columns):
+                    self._pop(entry_key)
+
+    def _pop(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._total -= entry[2]
+
+    @staticmethod
+    def _analyser_bytes(analyser) -> int:
+        # the analysers keep their own cleaned copy of the columns they use
+        if hasattr(analyser, "clean_df"):
+            return int(analyser.clean_df.memory_usage(index=True, deep=False).sum())
+        if hasattr(analyser, "series"):
+            return int(analyser.series.memory_usage(index=True, deep=False))
+        return 0
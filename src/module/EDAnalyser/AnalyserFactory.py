@@ -1,5 +1,7 @@
+import threading
 import pandas as pd
-from module.utils import classify_dtype
+from module.column_profile import get_profile, get_fingerprint
+from module.EDAnalyser.AnalyserCache import AnalyserCache
 from module.EDAnalyser.Univariate.NumericalAnalyser import NumericalAnalyser
 from module.EDAnalyser.Univariate.CategoricalAnalyser import CategoricalAnalyser
 from module.EDAnalyser.Univariate.DatetimeAnalyser import DatetimeAnalyser
@@ -9,38 +11,78 @@ from module.EDAnalyser.Bivariate.CatCatAnalyser import CatCatAnalyser
 from module.EDAnalyser.Bivariate.NumTimeAnalyser import NumTimeAnalyser
 from module.EDAnalyser.Bivariate.CatTimeAnalyser import CatTimeAnalyser
 
+ANALYSERS = {
+    "numerical": NumericalAnalyser,
+    "categorical": CategoricalAnalyser,
+    "datetime": DatetimeAnalyser,
+}
+
 class AnalyserFactory:
-    _cache = {}
+    _cache = AnalyserCache()
+    # summaries computed elsewhere, e.g. by ParallelPrecompute, for analysers built later
+    _summaries = {}     # (scope, col, fingerprint) -> summary
+    _lock = threading.Lock()
 
     @staticmethod
-    def create(df, col_name):
-        if col_name in AnalyserFactory._cache:
-            return AnalyserFactory._cache[col_name]
-        
-        dtype = classify_dtype(df[col_name])
+    def create(df, col_name, scope=None):
+        key = (col_name, get_fingerprint(df, col_name))
+        analyser = AnalyserFactory._cache.get(scope, key)
+        if analyser is not None:
+            analyser.df = df    # same column content, release the older frame
+            return analyser
+
+        dtype = get_profile(df, col_name).dtype_class
         analyser = None
-        if dtype == 'datetime':
-            analyser = DatetimeAnalyser(df, col_name)
-        elif dtype == 'numerical':
-            analyser = NumericalAnalyser(df, col_name)
-        elif dtype == 'categorical':
-            analyser = CategoricalAnalyser(df, col_name)
-        
-        AnalyserFactory._cache[col_name] = analyser
+        if dtype in ANALYSERS:
+            analyser = ANALYSERS[dtype](df, col_name)
+            with AnalyserFactory._lock:
+                if (scope,) + key in AnalyserFactory._summaries:
+                    analyser.set_summary(AnalyserFactory._summaries[(scope,) + key])
+
+        AnalyserFactory._cache.put(scope, key, analyser, [col_name])
         return analyser
-    
+
+    @staticmethod
+    def put_summary(df, col_name, summary, scope=None):
+        '''
+        Keep the summary of a column for its analyser, without building the analyser.
+        '''
+        with AnalyserFactory._lock:
+            AnalyserFactory._summaries[(scope, col_name, get_fingerprint(df, col_name))] = summary
+
+    @staticmethod
+    def figure_key(df, col_name, *extra):
+        '''
+        The figure key of a column's analyser, see BaseAnalyser.figure_key, without building it.
+        '''
+        analyser_class = ANALYSERS[get_profile(df, col_name).dtype_class]
+        return (analyser_class.__name__, col_name, get_fingerprint(df, col_name)) + extra
+
+    @staticmethod
+    def invalidate(scope, columns=None):
+        AnalyserFactory._cache.invalidate(scope, columns)
+        with AnalyserFactory._lock:
+            for key in list(AnalyserFactory._summaries):
+                if key[0] == scope and (columns is None or key[1] in columns):
+                    del AnalyserFactory._summaries[key]
+
 class BivariateAnalyserFactory:
-    _cache = {}
+    _cache = AnalyserCache()
 
     @staticmethod
-    def create(df, col1, col2, hue=None):
-        if (col1, col2, hue) in BivariateAnalyserFactory._cache:
-            return BivariateAnalyserFactory._cache[(col1, col2, hue)]
-        if (col2, col1, hue) in BivariateAnalyserFactory._cache:
-            return BivariateAnalyserFactory._cache[(col2, col1, hue)]
-        
-        dtype1 = classify_dtype(df[col1])
-        dtype2 = classify_dtype(df[col2])
+    def create(df, col1, col2, hue=None, scope=None):
+        def _column_key(col):
+            return None if col is None else (col, get_fingerprint(df, col))
+
+        key1, key2, hue_key = _column_key(col1), _column_key(col2), _column_key(hue)
+        for key in ((key1, key2, hue_key), (key2, key1, hue_key)):
+            analyser = BivariateAnalyserFactory._cache.get(scope, key)
+            if analyser is not None:
+                analyser.df = df    # same column content, release the older frame
+                return analyser
+
+        dtype1 = get_profile(df, col1).dtype_class
+        dtype2 = get_profile(df, col2).dtype_class
         analyser = None
         if dtype1 == 'numerical' and dtype2 == 'numerical':
             analyser = NumNumAnalyser(df, col1, col2, hue)
@@ -52,6 +94,10 @@ class BivariateAnalyserFactory:
             analyser = NumTimeAnalyser(df, col1, col2, None)
         elif (dtype1 == 'categorical' and dtype2 == 'datetime') or (dtype1 == 'datetime' and dtype2 == 'categorical'):
             analyser = CatTimeAnalyser(df, col1, col2, None)
-        
-        BivariateAnalyserFactory._cache[(col1, col2, hue)] = analyser
+
+        BivariateAnalyserFactory._cache.put(scope, (key1, key2, hue_key), analyser, [col1, col2, hue])
         return analyser
+
+    @staticmethod
+    def invalidate(scope, columns=None):
+        BivariateAnalyserFactory._cache.invalidate(scope, columns)
@@ -0,0 +1,234 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+import pandas as pd
+from module.column_profile import get_profile, get_time_parts, get_top_k
+from module.EDAnalyser.CorrelationEngine import correlation_from_sums, pairwise_sums
+
+# the sample of the scan, set in every worker process once instead of sent with every task
+_sample = None
+
+class AssociationScan:
+    '''
+    Rank every column pair by a strength measure in [0, 1] that fits the pair's types:
+
+    - numerical vs numerical: |Pearson| or |Spearman|
+    - numerical vs datetime: trend strength, |Pearson| against the time
+    - categorical vs numerical or datetime: correlation ratio (eta)
+    - categorical vs categorical: Cramér's V over the top-K codes
+
+    Each measure is computed for a block of columns against all the others with
+    matrix products over a uniform row sample, and the blocks are spread over a
+    process pool. The strengths are meant for ranking; the pair analysers give
+    the exact statistics of a chosen pair.
+    '''
+    def __init__(self, df, method="pearson", sample_rows=200_000, k=10, workers=None, seed=0):
+        self.df = df
+        self.method = method
+        self.sample_rows = sample_rows
+        self.k = k
+        self.workers = workers if workers is not None else min(os.cpu_count() or 1, 4)
+        self.seed = seed
+
+    def run(self, step=None) -> pd.DataFrame:
+        '''
+        Returns one row per pair with "col1", "col2", "measure" and "strength", strongest first.
+        `step`, if given, is called between columns and blocks with the fraction of blocks done,
+        e.g. to stop a cancelled task; queued blocks are then dropped.
+        '''
+        step = step or (lambda progress=None: None)
+        sample = self._sample(step)
+        tasks = self._tasks(sample)
+        results = []
+        if self.workers > 1 and len(tasks) > 1:
+            # forkserver workers do not inherit the threads and locks of the server process
+            context = multiprocessing.get_context("forkserver")
+            pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_set_sample, initargs=(sample,))
+            try:
+                futures = [pool.submit(_run_task, task) for task in tasks]
+                pending = set(futures)
+                while pending:
+                    # wake up regularly so that a cancelled scan stops without waiting for a block
+                    _, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    step(1 - len(pending) / len(tasks))
+                results = [future.result() for future in futures]
+            finally:
+                # a cancelled scan leaves the running blocks to finish on their own
+                pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            _set_sample(sample)
+            try:
+                for task in tasks:
+                    results.append(_run_task(task))
+                    step(len(results) / len(tasks))
+            finally:
+                _set_sample(None)
+
+        rows = [row for result in results for row in result]
+        scan = pd.DataFrame(rows, columns=["col1", "col2", "measure", "strength"])
+        return scan.dropna(subset=["strength"]).sort_values("strength", ascending=False, ignore_index=True)
+
+    def _sample(self, step=lambda progress=None: None) -> dict:
+        '''
+        Numerical, datetime and categorical columns of a row sample, as matrices.
+        '''
+        n = len(self.df)
+        rows = np.arange(n)
+        if n > self.sample_rows:
+            rows = np.sort(np.random.default_rng(self.seed).choice(n, self.sample_rows, replace=False))
+
+        kinds = {"numerical": [], "datetime": [], "categorical": []}
+        for col in self.df.columns:
+            kinds[get_profile(self.df, col).dtype_class].append(col)
+
+        def numeric(col):
+            values = self.df[col].iloc[rows]
+            if self.method == "spearman":
+                values = values.rank(method="average")
+            return values.to_numpy(dtype=float, na_value=np.nan)
+
+        def time(col):
+            # days since the epoch, from the cached decomposition
+            parts = get_time_parts(self.df, col)
+            days = parts.days[rows].astype(float)
+            days[~parts.valid[rows]] = np.nan
+            return days
+
+        def matrix(columns, values, dtype=float):
+            if not columns:
+                return np.empty((len(rows), 0), dtype=dtype)
+            stacked = []
+            for col in columns:
+                step()
+                stacked.append(values(col))
+            return np.column_stack(stacked).astype(dtype)
+
+        cat_codes = {col: get_top_k(self.df, col, self.k) for col in kinds["categorical"]}
+        return {
+            "method": self.method,
+            "num_names": kinds["numerical"], "num": matrix(kinds["numerical"], numeric),
+            "time_names": kinds["datetime"], "time": matrix(kinds["datetime"], time),
+            "cat_names": kinds["categorical"],
+            "cat": matrix(kinds["categorical"], lambda col: cat_codes[col][0][rows], np.int32),
+            "cat_sizes": [len(categories) for _, categories in cat_codes.values()],
+        }
+
+    def _tasks(self, sample) -> list:
+        '''
+        Split every measure into blocks of columns, a few per worker.
+        '''
+        blocks = max(self.workers * 2, 1)
+        tasks = []
+        for kind, names in (("num", sample["num_names"]), ("cat", sample["cat_names"])):
+            for block in np.array_split(np.arange(len(names)), min(blocks, len(names))):
+                if len(block):
+                    tasks.append((kind, block.tolist()))
+        return tasks
+
+def _set_sample(sample):
+    global _sample
+    _sample = sample
+
+def _run_task(task) -> list:
+    kind, block = task
+    if kind == "num":
+        return _numeric_block(_sample, block)
+    return _categorical_block(_sample, block)
+
+def _numeric_block(sample, block) -> list:
+    '''
+    Numerical columns of the block against the later numerical columns and all datetime columns.
+    '''
+    rows = []
+    num, names = sample["num"], sample["num_names"]
+    x = num[:, block]
+    measure = "|spearman|" if sample["method"] == "spearman" else "|pearson|"
+    corr = _correlation(x, num)
+    for i, col in zip(block, corr):
+        for j in range(i + 1, len(names)):
+            rows.append((names[i], names[j], measure, abs(col[j])))
+    if sample["time_names"]:
+        trend = _correlation(x, sample["time"])
+        for i, col in zip(block, trend):
+            for j, name in enumerate(sample["time_names"]):
+                rows.append((names[i], name, "trend", abs(col[j])))
+    return rows
+
+def _categorical_block(sample, block, max_cells=4_000_000) -> list:
+    '''
+    Categorical columns of the block against the numerical and datetime columns, and the
+    later categorical columns.
+
+    With O the one-hot matrix of all categorical codes, O_block.T @ O holds every
+    contingency table of the block and O_block.T @ [valid, values, values ** 2] the
+    per-category counts, sums and sums of squares of every target, so both measures
+    come from two dense products per chunk of rows. Every column has at most k + 1
+    levels (its top-K codes), and the chunks are sized so that a one-hot chunk holds
+    at most `max_cells` values however many categorical columns there are.
+    '''
+    cats, sizes, names = sample["cat"], sample["cat_sizes"], sample["cat_names"]
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+    levels = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in block])
+    targets = np.hstack([sample["num"], sample["time"]])
+    target_names = sample["num_names"] + sample["time_names"]
+    with np.errstate(all="ignore"):
+        # centering keeps the sums of squares numerically stable
+        shift = np.nan_to_num(np.nanmean(targets, axis=0))
+
+    p = targets.shape[1]
+    chunk_rows = max(1, max_cells // max(int(offsets[-1]), 1))
+    by_target = np.zeros((len(levels), 3 * p))
+    tables = np.zeros((len(levels), offsets[-1]))
+    for start in range(0, len(cats), chunk_rows):
+        codes = cats[start:start + chunk_rows]
+        one_hot = np.zeros((len(codes), offsets[-1]))
+        row, col = np.nonzero(codes >= 0)
+        one_hot[row, codes[row, col] + offsets[col]] = 1.0
+        chunk = targets[start:start + chunk_rows] - shift
+        valid = ~np.isnan(chunk)
+        chunk = np.where(valid, chunk, 0.0)
+        block_hot = one_hot[:, levels].T
+        by_target += block_hot @ np.hstack([valid, chunk, chunk * chunk])
+        tables += block_hot @ one_hot
+
+    rows = []
+    position = 0
+    for i in block:
+        own = slice(position, position + sizes[i])
+        position += sizes[i]
+        count, total, square = np.split(by_target[own], 3, axis=1)
+        for name, eta in zip(target_names, _correlation_ratio(count, total, square)):
+            rows.append((names[i], name, "eta", eta))
+        for j in range(i + 1, len(names)):
+            table = tables[own, offsets[j]:offsets[j + 1]]
+            rows.append((names[i], names[j], "cramers_v", _cramers_v(table)))
+    return rows
+
+def _correlation(x, y) -> np.ndarray:
+    with np.errstate(all="ignore"):
+        x = x - np.nan_to_num(np.nanmean(x, axis=0))
+        y = y - np.nan_to_num(np.nanmean(y, axis=0))
+    return correlation_from_sums(*pairwise_sums(x, y))
+
+def _correlation_ratio(count, total, square) -> np.ndarray:
+    '''
+    Eta of one categorical column against every target, from the per-category
+    counts, sums and sums of squares of the rows where both are present.
+    '''
+    with np.errstate(all="ignore"):
+        n = count.sum(axis=0)
+        grand = total.sum(axis=0) ** 2 / n
+        between = (total ** 2 / np.where(count > 0, count, 1)).sum(axis=0) - grand
+        eta = np.sqrt(np.clip(between / (square.sum(axis=0) - grand), 0, 1))
+    eta[n < 2] = np.nan
+    return eta
+
+def _cramers_v(table) -> float:
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    n = table.sum()
+    if n == 0 or min(table.shape) < 2:
+        return np.nan
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    chi2 = ((table - expected) ** 2 / expected).sum()
+    return float(np.sqrt(chi2 / n / (min(table.shape) - 1)))
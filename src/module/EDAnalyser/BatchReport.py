@@ -0,0 +1,294 @@
+import base64
+import datetime
+import html
+import json
+import os
+import uuid
+import pandas as pd
+from module.column_profile import ProfileStore, columns_of_type, get_profile
+from module.data_loader import DataLoader
+from module.figure_cache import render_png
+from module.EDAnalyser.AssociationScan import AssociationScan
+from module.EDAnalyser.CorrelationEngine import CorrelationEngine, order_columns, plot_correlation
+from module.EDAnalyser.ParallelPrecompute import ParallelPrecompute
+
+class BatchReport:
+    '''
+    Headless EDA of a data file, for batch jobs without a browser session.
+
+    The file is loaded with DataLoader, then every column is analysed and the chosen
+    pairs are analysed on a process pool (see ParallelPrecompute), and the correlation
+    matrix of the numerical columns is computed with CorrelationEngine. Pairs are
+    given explicitly, or the `top_pairs` strongest ones of an AssociationScan are taken.
+    The results can be written as a self-contained HTML page or as JSON, with the
+    figures embedded as base64 PNG.
+
+    Example:
+        BatchReport("sales.csv", top_pairs=10, downcast=True).run().to_html("sales.html")
+    '''
+    # CSV files larger than this are parsed chunk by chunk, like large uploads in the app
+    chunked_load_bytes = 200 * 1024 * 1024
+
+    def __init__(self, source, columns=None, pairs=(), top_pairs=0, method="pearson", view="all",
+                 workers=None, dpi=100, **load_options):
+        '''
+        Args:
+            source: the path of a CSV, Parquet or Feather/Arrow file
+            columns (list): the columns to load, all columns if None
+            pairs (list): (col1, col2) or (col1, col2, hue) tuples to analyse
+            top_pairs (int): also analyse this many of the most associated pairs
+            method (str): "pearson" or "spearman", for the correlation matrix and the scan
+            view (str): "all", "clustered" or "top", the columns shown in the correlation heatmap
+            workers (int): the number of worker processes, all cores if None
+            dpi (int): the resolution of the figures
+            load_options: DataLoader keyword arguments, e.g. downcast=True
+        '''
+        self.source = source
+        self.load_columns = columns
+        self.pair_list = [tuple(pair) + (None,) * (3 - len(pair)) for pair in pairs]
+        self.top_pairs = top_pairs
+        self.method = method
+        self.view = view
+        self.workers = workers
+        self.dpi = dpi
+        self.load_options = load_options
+
+        self.data = None
+        self.memory_report = None
+        self.columns = {}           # col -> dtype, missing ratio, summary and figures
+        self.correlation = None
+        self.correlation_figure = None
+        self.associations = None
+        self.pairs = {}             # (col1, col2, hue) -> summary name, summary and figures
+        self.generated = None
+
+    def run(self, log=None) -> "BatchReport":
+        '''
+        Load the file and run every analysis. `log` optionally receives progress messages.
+        '''
+        log = log or (lambda message: None)
+        log(f"Loading {self.source}")
+        self.data = self._load()
+        log(f"Analysing {self.data.shape[1]} columns of {self.data.shape[0]} rows")
+        self._univariate()
+        log("Computing the correlation matrix")
+        self._correlation()
+        pairs = self._select_pairs()
+        log(f"Analysing {len(pairs)} pairs")
+        self._bivariate(pairs)
+        self.generated = datetime.datetime.now().isoformat(timespec="seconds")
+        return self
+
+    def _load(self) -> pd.DataFrame:
+        loader = DataLoader(None, **self.load_options)
+        file_format, _ = DataLoader.detect_format(self.source)
+        if file_format is None:
+            raise ValueError(f"Unsupported file type: {self.source}")
+        if file_format == "csv" and os.path.getsize(self.source) > self.chunked_load_bytes:
+            data = loader.load_data_chunked(self.source, self.load_columns)
+            ProfileStore.of(data).set_sketches(loader.sketches)
+        else:
+            data = loader.load_data(self.source, self.load_columns)
+        self.memory_report = loader.memory_report
+        return data
+
+    def _univariate(self):
+        def store(col, summary, figures):
+            profile = get_profile(self.data, col)
+            self.columns[col] = {
+                "dtype": profile.dtype_class,
+                "missing_ratio": profile.null_count / len(self.data) if len(self.data) else 0.0,
+                "summary": summary,
+                "figures": figures,
+            }
+
+        ParallelPrecompute(self.data, self.workers, self.dpi).univariate(store)
+        # keep the column order of the file
+        self.columns = {col: self.columns[col] for col in self.data.columns}
+
+    def _correlation(self):
+        numerical_cols = columns_of_type(self.data, "numerical")
+        if len(numerical_cols) < 2:
+            return
+        scope = uuid.uuid4().hex
+        try:
+            self.correlation = CorrelationEngine.matrix(self.data, numerical_cols, self.method, scope=scope)
+        finally:
+            CorrelationEngine.invalidate(scope)
+        shown = order_columns(self.correlation, self.view)
+        self.correlation_figure = render_png(
+            lambda: plot_correlation(self.correlation.loc[shown, shown], self.method), self.dpi
+        )
+
+    def _select_pairs(self) -> list:
+        for pair in self.pair_list:
+            missing = [col for col in pair if col is not None and col not in self.data.columns]
+            if missing:
+                raise ValueError(f"Unknown columns in pair {pair[:2]}: {missing}")
+            if pair[0] == pair[1] or pair[2] in pair[:2]:
+                raise ValueError(f"A pair needs two distinct columns and a separate hue: {pair}")
+        pairs = list(dict.fromkeys(self.pair_list))
+        if self.top_pairs:
+            workers = self.workers if self.workers is not None else min(os.cpu_count() or 1, 4)
+            self.associations = AssociationScan(self.data, method=self.method, workers=workers).run()
+            chosen = {frozenset(pair[:2]) for pair in pairs}
+            limit = len(chosen) + self.top_pairs
+            for col1, col2 in self.associations[["col1", "col2"]].itertuples(index=False):
+                if len(chosen) >= limit:
+                    break
+                if frozenset((col1, col2)) not in chosen:
+                    chosen.add(frozenset((col1, col2)))
+                    pairs.append((col1, col2, None))
+        return pairs
+
+    def _bivariate(self, pairs):
+        def store(pair, name, summary, figures):
+            self.pairs[pair] = {"name": name, "summary": summary, "figures": figures}
+
+        ParallelPrecompute(self.data, self.workers, self.dpi).bivariate(pairs, store)
+        self.pairs = {pair: self.pairs[pair] for pair in pairs}
+
+    def to_dict(self, figures=True) -> dict:
+        '''
+        The report as JSON-compatible values. Tables are in pandas' "split" layout and
+        figures, if kept, are PNG data URIs keyed by their period ("" if none).
+        '''
+        def images(pngs):
+            return {" ".join(map(str, extra)): _data_uri(png) for extra, png in pngs.items()} if figures else {}
+
+        correlation = None
+        if self.correlation is not None:
+            correlation = {
+                "method": self.method,
+                "matrix": _json_table(self.correlation),
+                "figure": _data_uri(self.correlation_figure) if figures and self.correlation_figure else None,
+            }
+        return {
+            "source": str(self.source),
+            "generated": self.generated,
+            "rows": int(self.data.shape[0]),
+            "columns": int(self.data.shape[1]),
+            "missing_values": int(sum(get_profile(self.data, col).null_count for col in self.data.columns)),
+            "memory_report": _json_table(self.memory_report),
+            "univariate": [
+                {
+                    "column": str(col),
+                    "dtype": result["dtype"],
+                    "missing_ratio": result["missing_ratio"],
+                    "summary": _json_table(result["summary"]),
+                    "figures": images(result["figures"]),
+                }
+                for col, result in self.columns.items()
+            ],
+            "correlation": correlation,
+            "associations": _json_table(self.associations),
+            "bivariate": [
+                {
+                    "col1": str(col1), "col2": str(col2), "hue": None if hue is None else str(hue),
+                    "name": result["name"],
+                    "summary": _json_table(result["summary"]),
+                    "figures": images(result["figures"]),
+                }
+                for (col1, col2, hue), result in self.pairs.items()
+            ],
+        }
+
+    def to_json(self, path, figures=True):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(figures), f, indent=2)
+
+    def to_html(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.html())
+
+    def html(self) -> str:
+        '''
+        The report as a single HTML page, figures included.
+        '''
+        report = self.to_dict(figures=True)
+        body = [
+            f"<h1>EDA Report: {_escape(report['source'])}</h1>",
+            f"<p>Generated {_escape(report['generated'])} &middot; {report['rows']} rows &middot; "
+            f"{report['columns']} columns &middot; {report['missing_values']} missing values</p>",
+        ]
+        if self.memory_report is not None:
+            body += ["<h2>Memory</h2>", _html_table(self.memory_report)]
+
+        body.append("<h2>Columns</h2>")
+        for col, result in self.columns.items():
+            body += [
+                f"<h3>{_escape(col)}</h3>",
+                f"<p>Data type: {result['dtype']} &middot; Missing ratio: {result['missing_ratio']:.1%}</p>",
+                _html_table(result["summary"]),
+                _html_figures(result["figures"]),
+            ]
+
+        if self.correlation is not None:
+            body += [f"<h2>Correlation Matrix ({self.method})</h2>", _html_figures({(): self.correlation_figure})]
+        if self.associations is not None:
+            body += ["<h2>Strongest Associations</h2>", _html_table(self.associations.head(50).round(4))]
+
+        if self.pairs:
+            body.append("<h2>Relationships</h2>")
+        for (col1, col2, hue), result in self.pairs.items():
+            title = f"{col1} vs {col2}" + ("" if hue is None else f" by {hue}")
+            body += [
+                f"<h3>{_escape(title)}</h3>",
+                f"<h4>{_escape(result['name'])}</h4>" if result["summary"] is not None else "",
+                _html_table(result["summary"]),
+                _html_figures(result["figures"]),
+            ]
+        return HTML_PAGE.format(title=_escape(f"EDA Report: {report['source']}"), body="\n".join(body))
+
+HTML_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em auto; max-width: 1200px; color: #222; }}
+table {{ border-collapse: collapse; margin: 0.5em 0; font-size: 0.9em; }}
+th, td {{ border: 1px solid #ccc; padding: 0.25em 0.6em; text-align: right; }}
+th {{ background: #f3f3f3; }}
+figure {{ margin: 0.5em 0; }}
+img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+def _escape(value) -> str:
+    return html.escape(str(value))
+
+def _data_uri(png: bytes) -> str:
+    return "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+def _as_frame(table):
+    if table is None:
+        return None
+    return table.to_frame() if isinstance(table, pd.Series) else table
+
+def _json_table(table):
+    table = _as_frame(table)
+    if table is None:
+        return None
+    return json.loads(table.to_json(orient="split", date_format="iso", default_handler=str))
+
+def _html_table(table) -> str:
+    table = _as_frame(table)
+    if table is None:
+        return ""
+    return table.to_html(border=0, na_rep="")
+
+def _html_figures(figures) -> str:
+    items = []
+    for extra, png in figures.items():
+        if png is None:
+            continue
+        # datetime figures are drawn per period, name it under the figure
+        caption = f"<figcaption>{_escape(' '.join(map(str, extra)))}</figcaption>" if extra else ""
+        items.append(f'<figure><img src="{_data_uri(png)}">{caption}</figure>')
+    return "\n".join(items)
@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
 import pandas as pd
+from module.column_profile import get_codes, get_fingerprint
+from module.category_codes import as_categorical, compress_codes
 
 class BaseAnalyser(ABC):
+    # above this many rows, plots are drawn from binned aggregates instead of every point
+    aggregate_rows = 100_000
+
     def __init__(self, df, col1, col2, hue):
         self.df = df
         self.col1 = col1
@@ -17,23 +22,52 @@ class BaseAnalyser(ABC):
         """
         raise NotImplementedError
     
+    def _use_aggregates(self):
+        return len(self.clean_df) > self.aggregate_rows
+
     def make_clean(self):
         series = None
         if self.hue is not None:
             series = self.df[[self.col1, self.col2, self.hue]]
         else:
             series = self.df[[self.col1, self.col2]]
-        return series.dropna()
+        # remember which rows are kept, to line up per-column caches with clean_df
+        self._clean_rows = series.notna().all(axis=1).to_numpy()
+        return series[self._clean_rows]
+
+    def _compress_categories(self, col, k: int = 10) -> pd.Series:
+        """
+        Take top-K of categorical variable and replace the rest with "Others", aligned with clean_df
+        The top-K is ranked on the clean_df rows, from the cached codes of the column
+        """
+        codes, uniques = get_codes(self.df, col)
+        codes, categories = compress_codes(codes[self._clean_rows], uniques, k)
+        return as_categorical(codes, categories, index=self.clean_df.index, name=col)
 
-    def analyse(self):
+    def analyse(self, visualize=True):
         """
-        Perform the univariate analysis
+        Perform the univariate analysis, without the plot if `visualize` is False
         """
         return {
             "name": self._get_summary_name(),
             "summary": self._summary(),
-            "plot": self._visualize()
+            "plot": self._visualize() if visualize else None
         }
+
+    def visualize(self):
+        """
+        Draw the plot of the analysis
+        """
+        return self._visualize()
+
+    def figure_key(self, *extra):
+        """
+        Identify the figures of this analysis by type and column content
+        """
+        columns = []
+        for col in (self.col1, self.col2, self.hue):
+            columns += [col, None if col is None else get_fingerprint(self.df, col)]
+        return (type(self).__name__, *columns, self._use_aggregates()) + extra
     
     @abstractmethod
     def _get_summary_name(self):
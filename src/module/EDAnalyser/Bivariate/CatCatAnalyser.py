@@ -2,6 +2,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 from scipy.stats import chi2_contingency
+from module.category_codes import contingency_table
 from module.EDAnalyser.Bivariate.BaseBivariateAnalyser import BaseAnalyser
 
 class CatCatAnalyser(BaseAnalyser):
@@ -13,19 +14,8 @@ class CatCatAnalyser(BaseAnalyser):
         
         return not _is_high_cardinality(self)
     
-    def _compress_categories(self, s, k: int = 10) -> pd.Series:
-        """
-        Take top-K of categorical variable and replace the rest with "Others"
-        """
-        top_k = s.value_counts().nlargest(k).index
-        cat_series = s.apply(lambda x: x if x in top_k else "Others")
-        return cat_series
-    
     def _get_contingenncy_table(self):
-        clean_copy = self.clean_df.copy()
-        clean_copy[self.col1] = self._compress_categories(clean_copy[self.col1])
-        clean_copy[self.col2] = self._compress_categories(clean_copy[self.col2])
-        return pd.crosstab(clean_copy[self.col1], clean_copy[self.col2])
+        return contingency_table(self._compress_categories(self.col1), self._compress_categories(self.col2))
     
     def _get_summary_name(self):
         return "Chi-square test"
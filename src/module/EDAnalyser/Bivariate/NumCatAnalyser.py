@@ -1,30 +1,25 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
+import numpy as np
 import pandas as pd
-from module.utils import classify_dtype
+from module.column_profile import get_profile
+from module.distinct_counter import DistinctCounter
+from module.numeric_distribution import NumericDistribution
 from module.EDAnalyser.Bivariate.BaseBivariateAnalyser import BaseAnalyser
 
 class NumCatAnalyser(BaseAnalyser):
     def __init__(self, df, col1, col2, hue):
         super().__init__(df, col1, col2, hue)
-        self.cat = col1 if classify_dtype(self.df[self.col1]) == 'categorical' else col2
-        self.num = col1 if classify_dtype(self.df[self.col1]) == 'numerical' else col2
-        print(self.cat, self.num)
+        dtype1 = get_profile(self.df, self.col1).dtype_class
+        self.cat = col1 if dtype1 == 'categorical' else col2
+        self.num = col1 if dtype1 == 'numerical' else col2
         
     def _validate(self):
         def _is_high_cardinality(self, threshold=0.5):
-            return self.clean_df[self.cat].nunique() / len(self.clean_df) > threshold
+            return DistinctCounter.exceeds(self.clean_df[self.cat], threshold * len(self.clean_df))
         
         return not _is_high_cardinality(self)
     
-    def _compress_categories(self, s, k: int = 10) -> pd.Series:
-        """
-        Take top-K of categorical variable and replace the rest with "Others"
-        """
-        top_k = s.value_counts().nlargest(k).index
-        cat_series = s.apply(lambda x: x if x in top_k else "Others")
-        return cat_series
-    
     def _get_summary_name(self):
         return "Groupby Analysis"
 
@@ -32,11 +27,11 @@ class NumCatAnalyser(BaseAnalyser):
         if not self._validate():
             return None
         clean_copy = self.clean_df.copy()
-        clean_copy[self.cat] = self._compress_categories(clean_copy[self.cat])
+        clean_copy[self.cat] = self._compress_categories(self.cat)
         summary_df = (
             clean_copy[[self.num, self.cat]]
             .dropna()
-            .groupby(self.cat)[self.num]
+            .groupby(self.cat, observed=True)[self.num]
             .agg(["count", "mean", "std", "min", "max"])
             .reset_index()
             .sort_values("count", ascending=False)
@@ -48,14 +43,57 @@ class NumCatAnalyser(BaseAnalyser):
         fig, ax = plt.subplots(1, 2, figsize = (12, 6))
 
         # box plot
-        sns.boxplot(x = self.cat, y = self.num, data = self.clean_df, ax = ax[0])
+        if self._use_aggregates():
+            self._binned_boxplot(ax[0])
+        else:
+            sns.boxplot(x = self.cat, y = self.num, data = self.clean_df, ax = ax[0])
         ax[0].set_title(f'Box plot')
         ax[0].tick_params(axis='x', rotation=45)
 
-        # strip plot
-        sns.stripplot(x = self.cat, y = self.num, data = self.clean_df, ax = ax[1], jitter = True, hue=self.hue, dodge=True)
-        ax[1].set_title(f'Strip plot')
-        ax[1].tick_params(axis='x', rotation=45)
+        if self._use_aggregates():
+            self._binned_distribution(ax[1])
+        else:
+            # strip plot
+            sns.stripplot(x = self.cat, y = self.num, data = self.clean_df, ax = ax[1], jitter = True, hue=self.hue, dodge=True)
+            ax[1].set_title(f'Strip plot')
+            ax[1].tick_params(axis='x', rotation=45)
 
         plt.tight_layout()
-        return fig
\ No newline at end of file
+        return fig
+
+    def _binned_boxplot(self, ax, k: int = 10):
+        """
+        Draw the box plot of each top-K category from precomputed statistics, for large data
+        """
+        cats = self._compress_categories(self.cat, k)
+        codes = cats.cat.codes.to_numpy()
+        values = self.clean_df[self.num].to_numpy(dtype=float)
+        stats = [
+            NumericDistribution(values[codes == i], max_fliers=100).box_stats(str(value))
+            for i, value in enumerate(cats.cat.categories)
+        ]
+        ax.bxp([s for s in stats if "med" in s], patch_artist=True, medianprops={"color": "black"})
+        ax.set_xlabel(self.cat)
+        ax.set_ylabel(self.num)
+
+    def _binned_distribution(self, ax, n_bins: int = 50, k: int = 10):
+        """
+        Replace the strip plot with the binned distribution of each top-K category, for large data
+        """
+        values = self.clean_df[self.num].to_numpy(dtype=float)
+        cats = self._compress_categories(self.cat, k)
+        codes = cats.cat.codes.to_numpy()
+        top_k = cats.cat.categories
+        edges = np.linspace(values.min(), values.max(), n_bins + 1)
+
+        # one 2-D histogram over (value bin, category code) instead of a pass per category
+        counts, _, _ = np.histogram2d(values, codes, bins=[edges, np.arange(len(top_k) + 1) - 0.5])
+        density = counts / np.maximum(counts.sum(axis=0, keepdims=True), 1)
+
+        mesh = ax.pcolormesh(np.arange(len(top_k) + 1), edges, density, cmap='Blues')
+        ax.figure.colorbar(mesh, ax=ax, label='share of category')
+        ax.set_xticks(np.arange(len(top_k)) + 0.5)
+        ax.set_xticklabels([str(value) for value in top_k], rotation=45)
+        ax.set_xlabel(self.cat)
+        ax.set_ylabel(self.num)
+        ax.set_title(f'Binned distribution')
@@ -1,5 +1,7 @@
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 import seaborn as sns
+import numpy as np
 import pandas as pd
 from scipy.stats import linregress
 from module.EDAnalyser.Bivariate.BaseBivariateAnalyser import BaseAnalyser
@@ -24,6 +26,9 @@ class NumNumAnalyser(BaseAnalyser):
         }).round(4)
     
     def _visualize(self):
+        if self._use_aggregates():
+            return self._visualize_aggregated()
+
         fig, ax = plt.subplots(1, 2, figsize = (12, 6))
 
         # scatter plot
@@ -35,4 +40,49 @@ class NumNumAnalyser(BaseAnalyser):
         ax[1].set_title(f'Regression plot')
 
         plt.tight_layout()
-        return fig
\ No newline at end of file
+        return fig
+
+    def _visualize_aggregated(self, gridsize: int = 60, n_bins: int = 50, max_hue: int = 10):
+        """
+        Draw binned densities and a regression line from summary points, for large data
+        """
+        x = self.clean_df[self.col1].to_numpy(dtype=float)
+        y = self.clean_df[self.col2].to_numpy(dtype=float)
+        fig, ax = plt.subplots(1, 2, figsize = (12, 6))
+
+        # density plot: hexbin, or one contour layer of grid counts per hue
+        if self.hue is None:
+            hb = ax[0].hexbin(x, y, gridsize=gridsize, bins='log', mincnt=1, cmap='Blues')
+            fig.colorbar(hb, ax=ax[0], label='count')
+        else:
+            x_edges = np.linspace(x.min(), x.max(), gridsize + 1)
+            y_edges = np.linspace(y.min(), y.max(), gridsize + 1)
+            x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+            y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+            hue_values = self.clean_df[self.hue].value_counts().index[:max_hue]
+            colors = sns.color_palette(n_colors=len(hue_values))
+            handles = []
+            for value, color in zip(hue_values, colors):
+                mask = (self.clean_df[self.hue] == value).to_numpy()
+                counts, _, _ = np.histogram2d(x[mask], y[mask], bins=[x_edges, y_edges])
+                if counts.max() > 0:
+                    ax[0].contour(x_centers, y_centers, counts.T, levels=4, colors=[color], linewidths=1)
+                handles.append(Line2D([], [], color=color, label=str(value)))
+            ax[0].legend(handles=handles, title=self.hue)
+        ax[0].set_xlabel(self.col1)
+        ax[0].set_ylabel(self.col2)
+        ax[0].set_title(f'Density plot')
+
+        # regression fitted on every row, drawn over the mean of each x quantile bin
+        slope, intercept, _, _, _ = linregress(x, y)
+        bins = pd.qcut(x, q=n_bins, duplicates='drop')
+        binned = pd.DataFrame({'x': x, 'y': y}).groupby(bins, observed=True).mean()
+        ax[1].scatter(binned['x'], binned['y'], alpha=0.6)
+        line_x = np.array([x.min(), x.max()])
+        ax[1].plot(line_x, intercept + slope * line_x, color='r')
+        ax[1].set_xlabel(self.col1)
+        ax[1].set_ylabel(self.col2)
+        ax[1].set_title(f'Regression plot (binned means)')
+
+        plt.tight_layout()
+        return fig
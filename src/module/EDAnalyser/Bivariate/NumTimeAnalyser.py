@@ -1,60 +1,41 @@
-import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
+import numpy as np
 import pandas as pd
 from scipy.stats import linregress
-from module.utils import classify_dtype
+from module.column_profile import get_profile, get_time_parts
 from module.EDAnalyser.Bivariate.BaseBivariateAnalyser import BaseAnalyser
 
 class NumTimeAnalyser(BaseAnalyser):
     def __init__(self, df, col1, col2, hue):
         super().__init__(df, col1, col2, hue)
-        self.num = self.col1 if classify_dtype(self.df[self.col1]) == 'numerical' else self.col2
-        self.time = self.col1 if classify_dtype(self.df[self.col1]) == 'datetime' else self.col2
-        self.granularity = self._infer_time_granularity()
+        dtype1 = get_profile(self.df, self.col1).dtype_class
+        self.num = self.col1 if dtype1 == 'numerical' else self.col2
+        self.time = self.col1 if dtype1 == 'datetime' else self.col2
+        self.granularity = get_time_parts(self.df, self.time).granularity
 
     def _validate(self):
         return True
     
-    def _infer_time_granularity(self):
-        granularity = []
-        dt = self.df[self.time].dropna()
-        
-        if dt.dt.second.nunique() > 1:
-            granularity.append('second')
-        if dt.dt.minute.nunique() > 1:
-            granularity.append('minute')
-        if dt.dt.hour.nunique() > 1:
-            granularity.append('hour')
-        if dt.dt.dayofweek.nunique() > 1:
-            granularity.append('dayofweek')
-        if dt.dt.day.nunique() > 1:
-            granularity.append('day')
-        if dt.dt.month.nunique() > 1:
-            granularity.append('month')
-        if dt.dt.year.nunique() > 1:
-            granularity.append('year')
-        
-        return granularity
-    
     def _groupby_granularity(self):
+        parts = get_time_parts(self.df, self.time)
+        values = self.clean_df[self.num].to_numpy(dtype=float)
         results = []
         for g in self.granularity:
-            temp = self.clean_df.groupby(getattr(self.clean_df[self.time].dt, g))[self.num].mean().reset_index()
-            temp.columns = [g, "mean_value"]  
-            temp["granularity"] = g
-            temp.columns = ["time", "mean_value", "granularity"]    # rename the 1st column to time
-            results.append(temp)
+            means = parts.means(g, values, rows=self._clean_rows)
+            results.append(pd.DataFrame({
+                "time": np.asarray(means.index),
+                "mean_value": means.to_numpy(),
+                "granularity": g,
+            }))
 
-        final_df = pd.concat(results, ignore_index=True)
-        print(final_df.columns)
-        return final_df
+        return pd.concat(results, ignore_index=True)
     
     def _get_summary_name(self):
         return "Linear Regression Analysis"
 
     def _summary(self):
-        time_ordinal = self.clean_df[self.time].map(datetime.datetime.toordinal)
+        time_ordinal = pd.Series(get_time_parts(self.df, self.time).ordinal(self._clean_rows), index=self.clean_df.index)
         corr_coef = self.clean_df[self.num].corr(time_ordinal)
         slope, intercept, r_value, p_value, std_err = linregress(self.clean_df[self.num], time_ordinal)
         return pd.DataFrame({
@@ -0,0 +1,155 @@
+import threading
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import squareform
+from module.column_profile import get_fingerprint, get_ranks
+
+# heatmaps with more columns than this are drawn without the values written in the cells
+ANNOTATE_MAX_COLUMNS = 20
+
+class CorrelationEngine:
+    '''
+    Correlation matrices kept per dataset and method, shared by every session.
+
+    Entries are keyed by the content fingerprints of the columns, so after a
+    feature-engineering step only the rows and columns of the changed columns are
+    recomputed, and an undo finds its old values again. Correlations use pairwise
+    complete rows like DataFrame.corr, accumulated over row chunks.
+    Spearman correlates the cached ranks of each column; it matches pandas when
+    no values are missing, otherwise pandas re-ranks every pair on its common rows.
+    '''
+    _matrices = {}  # (scope, method) -> (column keys, matrix)
+    _lock = threading.Lock()
+    chunk_rows = 1_000_000
+
+    @staticmethod
+    def matrix(df: pd.DataFrame, columns, method="pearson", scope=None, step=None) -> pd.DataFrame:
+        '''
+        `step`, if given, is called between columns and row chunks, e.g. to stop a cancelled task.
+        '''
+        columns = list(columns)
+        step = step or (lambda: None)
+        keys = []
+        for col in columns:
+            step()
+            keys.append((col, get_fingerprint(df, col)))
+        with CorrelationEngine._lock:
+            previous = CorrelationEngine._matrices.get((scope, method))
+
+        result = np.full((len(keys), len(keys)), np.nan)
+        stale = list(range(len(keys)))
+        if previous is not None:
+            old_keys, old_matrix = previous
+            position = {key: i for i, key in enumerate(old_keys)}
+            kept = [i for i, key in enumerate(keys) if key in position]
+            old = [position[keys[i]] for i in kept]
+            result[np.ix_(kept, kept)] = old_matrix[np.ix_(old, old)]
+            stale = [i for i, key in enumerate(keys) if key not in position]
+
+        if stale:
+            block = CorrelationEngine._block(df, [columns[i] for i in stale], columns, method, step)
+            result[stale, :] = block
+            result[:, stale] = block.T
+            # a column correlates exactly 1 with itself unless it is constant
+            diagonal = np.diag(result).copy()
+            np.fill_diagonal(result, np.where(np.isnan(diagonal), np.nan, 1.0))
+
+        with CorrelationEngine._lock:
+            CorrelationEngine._matrices[(scope, method)] = (keys, result)
+        return pd.DataFrame(result, index=columns, columns=columns)
+
+    @staticmethod
+    def invalidate(scope):
+        with CorrelationEngine._lock:
+            for entry_key in [k for k in CorrelationEngine._matrices if k[0] == scope]:
+                del CorrelationEngine._matrices[entry_key]
+
+    @staticmethod
+    def _values(df, col, method, start, stop):
+        if method == "spearman":
+            return get_ranks(df, col)[start:stop]
+        return df[col].iloc[start:stop].to_numpy(dtype=float, na_value=np.nan)
+
+    @staticmethod
+    def _block(df, rows, columns, method, step) -> np.ndarray:
+        '''
+        Correlations of the `rows` columns against all `columns`, from pairwise sums
+        over the rows where both values are present.
+        '''
+        sums, shifts = None, None
+        def values(cols, start, stop):
+            stacked = []
+            for col in cols:
+                step()
+                stacked.append(CorrelationEngine._values(df, col, method, start, stop))
+            return np.column_stack(stacked)
+
+        for start in range(0, len(df), CorrelationEngine.chunk_rows):
+            stop = start + CorrelationEngine.chunk_rows
+            x = values(rows, start, stop)
+            y = values(columns, start, stop)
+            if shifts is None:
+                # centering on the first chunk's means keeps the sums numerically stable
+                with np.errstate(all="ignore"):
+                    shifts = np.nan_to_num(np.nanmean(x, axis=0)), np.nan_to_num(np.nanmean(y, axis=0))
+            step()
+            chunk_sums = pairwise_sums(x - shifts[0], y - shifts[1])
+            sums = chunk_sums if sums is None else [total + part for total, part in zip(sums, chunk_sums)]
+        if sums is None:
+            return np.full((len(rows), len(columns)), np.nan)
+        return correlation_from_sums(*sums)
+
+def pairwise_sums(x, y):
+    '''
+    Count, sums, sums of squares and cross products of every column of `x` with
+    every column of `y`, over the rows where both are not NaN, as matrix products.
+    '''
+    mask_x, mask_y = ~np.isnan(x), ~np.isnan(y)
+    x = np.where(mask_x, x, 0.0)
+    y = np.where(mask_y, y, 0.0)
+    mx, my = mask_x.astype(float), mask_y.astype(float)
+    return [mx.T @ my, x.T @ my, mx.T @ y, (x * x).T @ my, mx.T @ (y * y), x.T @ y]
+
+def correlation_from_sums(count, sum_x, sum_y, sum_xx, sum_yy, sum_xy) -> np.ndarray:
+    with np.errstate(all="ignore"):
+        cov = sum_xy - sum_x * sum_y / count
+        var_x = sum_xx - sum_x ** 2 / count
+        var_y = sum_yy - sum_y ** 2 / count
+        corr = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+    corr[count < 2] = np.nan
+    return corr
+
+def order_columns(corr: pd.DataFrame, view="all", top_n=20) -> list:
+    '''
+    Pick and order the columns to draw.
+    "clustered" puts strongly correlated columns next to each other (average
+    linkage on 1 - |r|); "top" keeps the `top_n` columns with the largest
+    summed |r| to the others; "all" keeps the original order.
+    '''
+    columns = list(corr.columns)
+    strength = corr.abs().fillna(0).to_numpy()
+    np.fill_diagonal(strength, 0)
+    if view == "top" and len(columns) > top_n:
+        best = np.sort(np.argsort(-strength.sum(axis=0), kind="stable")[:top_n])
+        columns = [columns[i] for i in best]
+        strength = strength[np.ix_(best, best)]
+    if view in ("clustered", "top") and len(columns) > 2:
+        distance = 1 - strength
+        np.fill_diagonal(distance, 0)
+        order = leaves_list(linkage(squareform(distance, checks=False), method="average"))
+        columns = [columns[i] for i in order]
+    return columns
+
+def plot_correlation(corr: pd.DataFrame, method="pearson"):
+    '''
+    Heatmap of a correlation matrix, with the values written in the cells of small matrices.
+    '''
+    fig, ax = plt.subplots(figsize=(10, 8))
+    labels = True if len(corr) <= 2 * ANNOTATE_MAX_COLUMNS else "auto"
+    sns.heatmap(corr, annot=len(corr) <= ANNOTATE_MAX_COLUMNS, fmt=".2f", cmap="coolwarm", vmin=-1, vmax=1,
+                xticklabels=labels, yticklabels=labels, ax=ax)
+    ax.set_title(f"Correlation Matrix ({method})")
+    return fig
@@ -0,0 +1,173 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from module.column_profile import get_profile
+from module.figure_cache import draw_lock, figure_png
+from module.EDAnalyser.AnalyserFactory import ANALYSERS, BivariateAnalyserFactory
+from module.EDAnalyser.Bivariate.CatTimeAnalyser import CatTimeAnalyser
+from module.EDAnalyser.Univariate.DatetimeAnalyser import DatetimeAnalyser
+
+# the memory-mapped dataset of a worker process, opened once by the pool initializer
+_table = None
+
+class ParallelPrecompute:
+    '''
+    Compute the summaries and figures of columns and column pairs on a process pool.
+
+    The frame is written once to an uncompressed Arrow IPC file that every worker
+    memory-maps, so a worker only materializes the columns it analyses and nothing
+    is pickled per worker. The results are handed to `on_result` as they arrive,
+    to be kept for the analysers and the figure cache or put in a report. Columns
+    Arrow cannot store, e.g. object columns mixing numbers and strings, are
+    analysed in this process instead.
+    '''
+    def __init__(self, df, workers=None, dpi=100):
+        self.df = df
+        self.workers = workers or os.cpu_count() or 1
+        self.dpi = dpi
+
+    def univariate(self, on_result, columns=None, progress=None):
+        '''
+        Args:
+            on_result (callable): receives (col, summary, figures) for each column, where
+                figures maps the extra figure key parts, e.g. the period, to PNG bytes
+            columns (list): the columns to analyse, all columns if None
+            progress (callable): optional callback receiving the fraction of columns done
+        '''
+        columns = list(self.df.columns if columns is None else columns)
+        tasks = [(_analyse, (col, get_profile(self.df, col).dtype_class, self.dpi), [col]) for col in columns]
+        self._run(columns, tasks, on_result, progress)
+
+    def bivariate(self, pairs, on_result, progress=None):
+        '''
+        Args:
+            pairs (list): (col1, col2, hue) tuples, hue may be None
+            on_result (callable): receives (pair, name, summary, figures) for each pair, with
+                figures as in `univariate`; categorical vs datetime pairs get the chi-square
+                tests of every period as summary and one figure per period
+            progress (callable): optional callback receiving the fraction of pairs done
+        '''
+        pairs = [tuple(pair) for pair in pairs]
+        columns = list(dict.fromkeys(col for pair in pairs for col in pair if col is not None))
+        tasks = [(_analyse_pair, (pair, self.dpi), [col for col in pair if col is not None]) for pair in pairs]
+        self._run(columns, tasks, on_result, progress)
+
+    def _run(self, columns, tasks, on_result, progress):
+        '''
+        Run (fn, args, columns) tasks: in the pool if Arrow could store all their columns,
+        otherwise here, on a copy of the columns.
+        '''
+        if not tasks:
+            return
+        done = 0
+
+        def finish(result):
+            nonlocal done
+            on_result(*result)
+            done += 1
+            if progress is not None:
+                progress(done / len(tasks))
+
+        directory = tempfile.mkdtemp(prefix="autodm-precompute-")
+        try:
+            path = os.path.join(directory, "data.arrow")
+            written = self._write(path, columns)
+            pooled = [task for task in tasks if written.issuperset(task[2])]
+            if pooled:
+                # forkserver workers do not inherit the threads and locks of the server process
+                context = multiprocessing.get_context("forkserver")
+                with ProcessPoolExecutor(min(self.workers, len(pooled)), mp_context=context,
+                                         initializer=_open_table, initargs=(path,)) as pool:
+                    futures = [pool.submit(fn, *args) for fn, args, _ in pooled]
+                    for future in as_completed(futures):
+                        finish(future.result())
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        for fn, args, task_columns in tasks:
+            if not written.issuperset(task_columns):
+                # pyplot is shared with the other threads of this process
+                with draw_lock:
+                    finish(fn(*args, df=self.df[task_columns].reset_index(drop=True)))
+
+    def _write(self, path, columns) -> set:
+        '''
+        Write the columns Arrow can store to `path`. Returns the columns written.
+        '''
+        import pyarrow as pa
+        from pyarrow import feather
+
+        # the workers reset the index, fingerprints are computed by the caller
+        frame = self.df[columns].reset_index(drop=True)
+        frame.columns = [str(col) for col in columns]
+        try:
+            feather.write_feather(frame, path, compression="uncompressed")
+            return set(columns)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+
+        written = []
+        for col in columns:
+            try:
+                pa.Array.from_pandas(self.df[col])
+                written.append(col)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                continue
+        feather.write_feather(frame[[str(col) for col in written]], path, compression="uncompressed")
+        return set(written)
+
+def _open_table(path):
+    global _table
+    import matplotlib
+    import pyarrow as pa
+
+    matplotlib.use("Agg")
+    _table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+def _read(columns):
+    df = _table.select([str(col) for col in columns]).to_pandas()
+    df.columns = list(columns)
+    return df
+
+def _analyse(col, dtype_class, dpi, df=None):
+    '''
+    Analyse one column in a worker, or in `df` if given.
+    Returns the column name, its summary and its figures as PNG bytes.
+    '''
+    df = _read([col]) if df is None else df
+    analyser = ANALYSERS[dtype_class](df, col)
+    figures = {}
+    if isinstance(analyser, DatetimeAnalyser):
+        for period in analyser.granularity:
+            figures[(period,)] = figure_png(analyser.visualize_by_period(period), dpi)
+    else:
+        fig = analyser.visualize()
+        if fig is not None:
+            figures[()] = figure_png(fig, dpi)
+    return col, analyser.get_summary(), figures
+
+def _analyse_pair(pair, dpi, df=None):
+    '''
+    Analyse one pair of columns in a worker, or in `df` if given.
+    Returns the pair, the summary name, the summary and the figures as PNG bytes.
+    '''
+    col1, col2, hue = pair
+    df = _read([col for col in pair if col is not None]) if df is None else df
+    # the results go back to the caller, the analyser is not kept in the factory's cache
+    scope = object()
+    analyser = BivariateAnalyserFactory.create(df, col1, col2, hue, scope=scope)
+    BivariateAnalyserFactory.invalidate(scope)
+    figures = {}
+    if isinstance(analyser, CatTimeAnalyser):
+        name, summary = "Chi-square test by period", analyser.summary_by_periods()
+        for period in analyser.granularity:
+            figures[(period,)] = figure_png(analyser.visualize_by_period(period), dpi)
+    else:
+        analyse = analyser.analyse(visualize=False)
+        name, summary = analyse["name"], analyse["summary"]
+        fig = analyser.visualize()
+        if fig is not None:
+            figures[()] = figure_png(fig, dpi)
+    return pair, name, summary, figures
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import pandas as pd
+from module.column_profile import get_fingerprint
 
 class BaseAnalyser(ABC):
     def __init__(self, df, col):
@@ -7,6 +8,9 @@ class BaseAnalyser(ABC):
         self.col = col
         self.series = self.df[self.col].dropna()
         self.valid = self._validate()
+        # an analyser is built per column version, so its summary can be reused
+        self._summary_result = None
+        self._has_summary = False
 
     @abstractmethod
     def _validate(self):
@@ -15,9 +19,9 @@ class BaseAnalyser(ABC):
         """
         raise NotImplementedError
 
-    def analyse(self, overview):
+    def analyse(self, overview, visualize=True):
         """
-        Perform the univariate analysis
+        Perform the univariate analysis, without the plot if `visualize` is False
 
         The overview (Dict): 
             rows             : int, the number of rows in the dataset
@@ -28,9 +32,37 @@ class BaseAnalyser(ABC):
         return {
             "dtype": self._get_dtype(),
             "missing_ratio": self._get_missing_ratio(overview),
-            "summary": self._summary(),
-            "plot": self._visualize()
+            "summary": self.get_summary(),
+            "plot": self._visualize() if visualize else None
         }
+
+    def visualize(self):
+        """
+        Draw the plot of the analysis
+        """
+        return self._visualize()
+
+    def figure_key(self, *extra):
+        """
+        Identify the figures of this analysis by type and column content
+        """
+        return (type(self).__name__, self.col, get_fingerprint(self.df, self.col)) + extra
+
+    def get_summary(self):
+        """
+        Get the summary, computed on first use
+        """
+        if not self._has_summary:
+            self._summary_result = self._summary()
+            self._has_summary = True
+        return self._summary_result
+
+    def set_summary(self, summary):
+        """
+        Use a summary computed elsewhere, e.g. by a worker process
+        """
+        self._summary_result = summary
+        self._has_summary = True
     
     @abstractmethod
     def _get_dtype(self):
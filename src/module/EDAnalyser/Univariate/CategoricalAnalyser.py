@@ -1,12 +1,15 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
+import numpy as np
 import pandas as pd
+from module.column_profile import distinct_exceeds, get_top_k
+from module.category_codes import as_categorical
 from module.EDAnalyser.Univariate.BaseUnivariateAnalyser import BaseAnalyser
 
 class CategoricalAnalyser(BaseAnalyser):
     def _validate(self):
         def _is_high_cardinality(self, threshold=0.5):
-            return self.series.nunique() / len(self.series) > threshold
+            return distinct_exceeds(self.df, self.col, threshold * len(self.series))
         
         return not _is_high_cardinality(self)
     
@@ -14,9 +17,17 @@ class CategoricalAnalyser(BaseAnalyser):
         """
         Take top-K of categorical variable and replace the rest with "Others"
         """
-        top_k = self.series.value_counts().nlargest(k).index
-        cat_series = self.series.apply(lambda x: x if x in top_k else "Others")
-        return cat_series
+        codes, categories = get_top_k(self.df, self.col, k)
+        # missing values are the -1 codes, which self.series has already dropped
+        return as_categorical(codes[codes >= 0], categories, index=self.series.index, name=self.col)
+
+    def _compressed_counts(self, k: int = 10) -> pd.Series:
+        """
+        Counts of the top-K categories and "Others", from the cached codes
+        """
+        codes, categories = get_top_k(self.df, self.col, k)
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        return pd.Series(counts, index=categories, name="count")
     
     def _get_dtype(self):
         return "categorical"
@@ -28,7 +39,7 @@ class CategoricalAnalyser(BaseAnalyser):
         if not self._validate():
             return None
         
-        plot_data = self._compress_categories().value_counts()
+        plot_data = self._compressed_counts()
         fig, ax = plt.subplots(1, 2, figsize = (12, 6))
 
         # histogram + kde plot
@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
+from module.column_profile import get_numeric_summary
+from module.numeric_distribution import NumericDistribution
 from module.EDAnalyser.Univariate.BaseUnivariateAnalyser import BaseAnalyser
 
 class NumericalAnalyser(BaseAnalyser):
@@ -10,34 +11,21 @@ class NumericalAnalyser(BaseAnalyser):
     def _get_dtype(self):
         return "numerical"
     
-    def summary(self, col):
-        """
-        Returns a summary of the numerical column.
-        """
-        report = {
-            'mean'  : [self.df[col].mean()],
-            'std'   : [self.df[col].std()],
-            'min'   : [self.df[col].min()],
-            'max'   : [self.df[col].max()],
-            'median': [self.df[col].median()],
-            'Q1'    : [self.df[col].quantile(0.25)],
-            'Q3'    : [self.df[col].quantile(0.75)],
-            'IQR'   : [self.df[col].quantile(0.75) - self.df[col].quantile(0.25)],
-            'range' : [self.df[col].max() - self.df[col].min()],
-            'skew'  : [self.df[col].skew()]
-        }
-        report = pd.DataFrame(report)
-        return report
+    def _summary(self):
+        return get_numeric_summary(self.df, self.col)
 
     def _visualize(self):
+        dist = NumericDistribution(self.series)
         fig, ax = plt.subplots(1, 2, figsize = (12, 6))
 
         # histogram + kde plot
-        sns.histplot(self.series, kde=True, ax=ax[0], color="skyblue")
+        dist.plot_hist(ax[0], color="skyblue")
+        ax[0].set_xlabel(self.col)
         ax[0].set_title(f"Distribution of {self.col}")
         
         # boxplot
-        sns.boxplot(self.series, ax=ax[1], color="skyblue")
+        dist.plot_box(ax[1], color="skyblue")
+        ax[1].set_ylabel(self.col)
         ax[1].set_title(f"Boxplot of {self.col}")
 
         plt.tight_layout()
@@ -2,12 +2,12 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from module.utils import classify_dtype
+from module.column_profile import get_profile, columns_of_type, distinct_exceeds, get_distinct_count
 
 class CategoricalEncodingHandler:
     def __init__(self, df):
         self.df = df
-        self.cat_cols = [col for col in df.columns if classify_dtype(df[col]) == "categorical"]
+        self.cat_cols = columns_of_type(df, "categorical")
         self.methods = [
             "frequency encoding", "one-hot encoding", 
             "label encoding (ordinal)", "label encoding (nominal)", 
@@ -18,17 +18,15 @@ class CategoricalEncodingHandler:
 
     # return unique counts & missing ratio
     def show_summary(self, col):
-        n_unique = self.df[col].nunique()
-        n_missing = self.df[col].isnull().sum() / len(self.df)
-        return n_unique, n_missing
+        profile = get_profile(self.df, col)
+        return get_distinct_count(self.df, col), profile.missing_ratio
 
     def suggest_encoding(self):
         encoding_dict = {}
         for col in self.cat_cols:
-            n_unique = self.df[col].nunique()
-            if n_unique <= 10:
+            if not distinct_exceeds(self.df, col, 10):
                 encoding_dict[col] = "one-hot encoding"
-            elif n_unique <= 50:
+            elif not distinct_exceeds(self.df, col, 50):
                 encoding_dict[col] = "frequency encoding"
             else:
                 encoding_dict[col] = "label encoding (nominal)"
@@ -36,10 +34,9 @@ class CategoricalEncodingHandler:
     
     def _frequency_encoding(self, col, preview = False):
         copy = self.df.copy()
-        copy[col] = copy[col].astype(str)
-        encoded = copy[col].value_counts().to_dict()
-        encoded = {str(k): v for k, v in encoded.items()}
-        copy[f'{col}_freq_encode'] = copy[col].map(encoded)
+        # count on the codes, missing values are counted as their own value
+        codes, _ = pd.factorize(copy[col], use_na_sentinel=False)
+        copy[f'{col}_freq_encode'] = np.bincount(codes)[codes]
         copy.drop(col, axis=1, inplace=True)
 
         return copy[[f'{col}_freq_encode']].astype(str) if preview else copy
@@ -54,8 +51,10 @@ class CategoricalEncodingHandler:
 
     def _label_encoding_ordinal(self, col, mapping, preview = False):
         copy = self.df.copy()
-        copy[col] = copy[col].astype(str)
-        copy[f'{col}_label_encode'] = copy[col].map(mapping)
+        # map each distinct value once and spread the result through the codes
+        codes, uniques = pd.factorize(copy[col], use_na_sentinel=False)
+        labels = pd.Series(np.asarray(uniques).astype(str)).map(mapping).to_numpy()
+        copy[f'{col}_label_encode'] = labels[codes]
         copy.drop(col, axis=1, inplace=True)
         return copy[[f'{col}_label_encode']].astype(str) if preview else copy
     
@@ -2,11 +2,14 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from module.utils import classify_dtype
+from module.column_profile import get_profile, get_quantiles
+from module.numeric_distribution import NumericDistribution
 
 class MissingValuesHandler:
-    def __init__(self, df):
+    def __init__(self, df, exact=True):
         self.df = df
+        # read the median from a sketch instead of the full column when False
+        self.exact = exact
         self.stat = self._missing_stat()
         self.methods  = {
             'numerical': ['mean', 'median'],
@@ -15,19 +18,19 @@ class MissingValuesHandler:
         }
 
     def show_methods(self, col):
-        dtype = classify_dtype(self.df[col])
+        dtype = get_profile(self.df, col).dtype_class
         return self.methods[dtype] + ['drop row', 'drop column']
 
     def _missing_stat(self):
-        missing_stats = (
-            self.df.isnull().sum()
-            .reset_index()
-            .rename(columns={'index': 'column', 0: 'missing_count'})
-        )
+        profiles = {col: get_profile(self.df, col) for col in self.df.columns}
+        missing_stats = pd.DataFrame({
+            'column': list(profiles),
+            'missing_count': [p.null_count for p in profiles.values()],
+        })
         # drop columns with no missing values
         missing_stats = missing_stats[missing_stats['missing_count'] > 0]
         missing_stats['missing_pct'] = missing_stats['missing_count'] / len(self.df) * 100
-        missing_stats['dtype'] = missing_stats['column'].map(lambda col: classify_dtype(self.df[col]))
+        missing_stats['dtype'] = missing_stats['column'].map(lambda col: profiles[col].dtype_class)
         # missing_stats = missing_stats.sort_values(by='missing_pct', ascending=False)
         return missing_stats
 
@@ -66,14 +69,17 @@ class MissingValuesHandler:
 
     # not show for "drop"
     def impute_plot_preview(self, col, method):
-        dtype = classify_dtype(self.df[col])
+        dtype = get_profile(self.df, col).dtype_class
         series_before = self.df[col].copy()
         series_after = self._impute(series_before, method)
 
         fig, ax = plt.subplots(1, 2, figsize=(12, 4), sharey=True)
 
         # plot by dtype
-        if dtype == 'numerical' or dtype == 'datetime':
+        if dtype == 'numerical':
+            NumericDistribution(series_before).plot_hist(ax[0], color='skyblue')
+            NumericDistribution(series_after).plot_hist(ax[1], color='orange')
+        elif dtype == 'datetime':
             sns.histplot(series_before.dropna(), ax=ax[0], kde=True, color='skyblue')
             sns.histplot(series_after, ax=ax[1], kde=True, color='orange')
         elif dtype == 'categorical':
@@ -90,13 +96,20 @@ class MissingValuesHandler:
 
 
     def _impute(self, series_before, method):
+        if method in ('mean', 'median') and pd.api.types.is_integer_dtype(series_before):
+            # nullable integers cannot hold a fractional fill value
+            series_before = series_before.astype('float64')
         if method == 'mean':
             return series_before.fillna(series_before.mean())
         elif method =='median':
-            return series_before.fillna(series_before.median())
+            if self.exact:
+                return series_before.fillna(series_before.median())
+            return series_before.fillna(get_quantiles(self.df, series_before.name, 0.5, exact=False))
         elif method =='mode':
             return series_before.fillna(series_before.mode().iloc[0])
         elif method == 'unknown':
+            if isinstance(series_before.dtype, pd.CategoricalDtype) and 'unknown' not in series_before.cat.categories:
+                series_before = series_before.cat.add_categories('unknown')
             return series_before.fillna('unknown')
         elif method == 'forward fill':
             return series_before.fillna(method='ffill')
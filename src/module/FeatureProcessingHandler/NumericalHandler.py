@@ -3,12 +3,17 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.preprocessing import PowerTransformer
-from module.utils import classify_dtype
+from module.column_profile import ProfileStore, columns_of_type, get_numeric_summary
+from module.numeric_distribution import NumericDistribution
+from module.downcast import widen
+from module.quantile_sketch import QuantileSketch
 
 class NumericalHandler:
-    def __init__(self, df):
+    def __init__(self, df, exact=True):
         self.df = df
-        self.num_cols = [col for col in df.columns if classify_dtype(df[col]) == "numerical"]
+        # read quantiles from sketches instead of the full column when False
+        self.exact = exact
+        self.num_cols = columns_of_type(df, "numerical")
         self.scale_method = ['None', 'MinMax', 'Standard', 'Robust']
         self.outlier_method = ['None', 'Percentile', 'IQR', 'Z-Score']
         self.transform_method = ['None', 'Log', 'Sqrt', 'Box-Cox']
@@ -48,26 +53,13 @@ class NumericalHandler:
         """
         Returns a summary of the numerical column.
         """
-        report = {
-            'mean'  : [self.df[col].mean()],
-            'std'   : [self.df[col].std()],
-            'min'   : [self.df[col].min()],
-            'max'   : [self.df[col].max()],
-            'median': [self.df[col].median()],
-            'Q1'    : [self.df[col].quantile(0.25)],
-            'Q3'    : [self.df[col].quantile(0.75)],
-            'IQR'   : [self.df[col].quantile(0.75) - self.df[col].quantile(0.25)],
-            'range' : [self.df[col].max() - self.df[col].min()],
-            'skew'  : [self.df[col].skew()]
-        }
-        report = pd.DataFrame(report)
-        return report
+        return get_numeric_summary(self.df, col, self.exact)
     
     def preview_plot(self, col, scale_method, outlier_method, transform_method, poly_method):
         after = self.process(col, scale_method, outlier_method, transform_method, poly_method, preview=True)
         fig, ax = plt.subplots(1, 2, figsize = (12, 6))
-        sns.histplot(self.df[col], ax=ax[0], kde=True)
-        sns.histplot(after, ax=ax[1], kde=True)
+        NumericDistribution(self.df[col]).plot_hist(ax[0], color="C0")
+        NumericDistribution(after).plot_hist(ax[1], color="C0")
         ax[0].set_title('Before Processing')
         ax[1].set_title('After Processing')
         return fig
@@ -87,9 +79,11 @@ class NumericalHandler:
         processed_col = copy[col]
         
         # Order: outlier --> transform --> polynomial --> scale
-        mask = self.outlier(processed_col, outlier_method)
-        copy = copy[mask]
-        processed_col = copy[col]
+        sketch = None if self.exact else ProfileStore.of(self.df).sketch(col)
+        mask = self.outlier(processed_col, outlier_method, sketch)
+        copy = copy[mask.fillna(False)]  # missing values of nullable integers compare as NA
+        # downcast columns could overflow in the arithmetic below
+        processed_col = widen(copy[col])
         processed_col = self.transform(processed_col, transform_method)
         processed_col = self.polynomial(processed_col, poly_method)
         processed_col = self.scale(processed_col, scale_method)
@@ -122,26 +116,24 @@ class NumericalHandler:
             std_val = processed_col.std()
             processed_col = (col - mean_val) / std_val
         elif method == "Robust":
-            Q1 = processed_col.quantile(0.25)
-            Q3 = processed_col.quantile(0.75)
+            Q1, Q3 = self._quantile(processed_col, [0.25, 0.75])
             processed_col = (col - Q1) / (Q3 - Q1)
         return processed_col
     
-    def outlier(self, col, method):
+    def outlier(self, col, method, sketch=None):
         """
         Handle the outlier by the specified method.
         Args:
             col (pd.Series): the column to be scaled
             method (str): the scaling method
+            sketch (QuantileSketch): a sketch of `col` to reuse when quantiles are not exact
         """
         processed_col = col.copy()
         if method == "Percentile":
-            lower_bound = processed_col.quantile(0.05)
-            upper_bound = processed_col.quantile(0.95)
+            lower_bound, upper_bound = self._quantile(processed_col, [0.05, 0.95], sketch)
             mask = (col >= lower_bound) & (col <= upper_bound)
         elif method == "IQR":
-            Q1 = processed_col.quantile(0.25)
-            Q3 = processed_col.quantile(0.75)
+            Q1, Q3 = self._quantile(processed_col, [0.25, 0.75], sketch)
             IQR = Q3 - Q1
             lower_bound = Q1 - 1.5 * IQR
             upper_bound = Q3 + 1.5 * IQR
@@ -155,6 +147,16 @@ class NumericalHandler:
             mask = pd.Series(True, index=col.index)
         return mask
     
+    def _quantile(self, col, q, sketch=None):
+        """
+        Exact quantiles of the column, or approximate ones from a sketch if not `self.exact`.
+        """
+        if self.exact:
+            return col.quantile(q).tolist()
+        if sketch is None:
+            sketch = QuantileSketch.from_values(col.to_numpy(dtype=float, na_value=np.nan))
+        return sketch.quantile(q).tolist()
+
     def transform(self, col, method):
         """
         Transform the numerical column by the specified method.
@@ -176,7 +178,7 @@ class NumericalHandler:
         elif method == "Box-Cox":
             pt = PowerTransformer(method='box-cox', standardize=False)
             processed_col = pd.Series(
-                pt.fit_transform(processed_col.values.reshape(-1, 1)).flatten(),
+                pt.fit_transform(processed_col.to_numpy(dtype=float, na_value=np.nan).reshape(-1, 1)).flatten(),
                 index=processed_col.index
             )
         return processed_col
@@ -0,0 +1,115 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class Cancelled(Exception):
+    '''
+    Raised inside a task whose result is no longer wanted.
+    '''
+
+class Task:
+    '''
+    A unit of background work. The function of the task receives it to report its
+    progress and to check for cancellation between its steps with `step`.
+    '''
+    def __init__(self, group, key):
+        self.group = group
+        self.key = key
+        self.progress = 0.0
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        # a task that has not started yet is dropped, a running one stops at its next step
+        self._cancelled.set()
+        self.future.cancel()
+
+    def step(self, progress=None):
+        '''
+        Record the progress in [0, 1] and stop here if the task was cancelled.
+        '''
+        if self._cancelled.is_set():
+            raise Cancelled(self.key)
+        if progress is not None:
+            self.progress = progress
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+class BackgroundRunner:
+    '''
+    Thread pools for the analyses of the interactive pages, shared by every session.
+
+    Tasks are identified by a group, e.g. a (dataset scope, view) pair, and a key
+    that describes their inputs; submitting a submitted key returns the same task,
+    so reruns attach to work already under way. Results often hold analysers and
+    with them the data, so a task is forgotten once its result is taken with
+    `take`, when the selection changes (`keep_only`) and when its scope is dropped.
+    Speculative tasks, views the user is likely to open next, run on their own
+    pool so they never delay the view that is waited for.
+    '''
+    def __init__(self, workers=None, speculative_workers=1):
+        workers = workers or min(os.cpu_count() or 1, 8)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="autodm-task")
+        self._spare = ThreadPoolExecutor(speculative_workers, thread_name_prefix="autodm-speculative")
+        self._tasks = {}    # (group, key) -> Task
+        self._lock = threading.Lock()
+
+    def submit(self, group, key, fn, *args, speculative=False) -> Task:
+        '''
+        Run `fn(task, *args)` in the background, unless the key is already submitted.
+        '''
+        with self._lock:
+            task = self._tasks.get((group, key))
+            if task is not None and not task.cancelled:
+                return task
+            task = Task(group, key)
+            pool = self._spare if speculative else self._pool
+            task.future = pool.submit(self._run, task, fn, args)
+            self._tasks[(group, key)] = task
+            return task
+
+    def keep_only(self, group, keys):
+        '''
+        Cancel and forget the tasks of a group whose key is not in `keys`.
+        '''
+        keys = set(keys)
+        with self._lock:
+            stale = [task for (task_group, key), task in self._tasks.items() if task_group == group and key not in keys]
+            for task in stale:
+                task.cancel()
+                del self._tasks[(group, task.key)]
+
+    def take(self, task, timeout=None):
+        '''
+        Wait for the result of a task and forget the task.
+        '''
+        result = task.result(timeout)
+        with self._lock:
+            if self._tasks.get((task.group, task.key)) is task:
+                del self._tasks[(task.group, task.key)]
+        return result
+
+    def drop_scope(self, scope):
+        '''
+        Cancel and forget every task of the groups (scope, name), e.g. when a dataset is replaced.
+        '''
+        with self._lock:
+            for (group, key), task in list(self._tasks.items()):
+                if isinstance(group, tuple) and group[:1] == (scope,):
+                    task.cancel()
+                    del self._tasks[(group, key)]
+
+    @staticmethod
+    def _run(task, fn, args):
+        task.step()
+        result = fn(task, *args)
+        task.progress = 1.0
+        return result
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+
+OTHERS = "Others"
+
+def compress_codes(codes, uniques, k: int = 10):
+    '''
+    Compress factorized codes, see pd.factorize, to their K most frequent values and "Others".
+
+    The codes are counted with a bincount and remapped through a lookup array, so no
+    Python code runs per row. Only the given codes are ranked, e.g. the rows left by
+    a pairwise dropna.
+    Returns the codes (-1 for missing values) and the categories, most frequent first.
+    '''
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]    # values missing from these rows are not ranked
+    top = order[:k]
+    lookup = np.full(len(uniques) + 1, -1, dtype=np.int32)  # the last slot maps missing values
+    lookup[top] = np.arange(len(top), dtype=np.int32)
+    categories = list(uniques[top])
+    if len(order) > k:
+        # a value literally named "Others" absorbs the rest, like the old string replacement did
+        if OTHERS in categories:
+            others = categories.index(OTHERS)
+        else:
+            others = len(categories)
+            categories.append(OTHERS)
+        lookup[order[k:]] = others
+    return lookup[codes], pd.Index(categories, tupleize_cols=False)
+
+def as_categorical(codes, categories, index=None, name=None) -> pd.Series:
+    '''
+    Wrap codes from compress_codes in a categorical Series.
+    '''
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=index, name=name)
+
+def contingency_table(a: pd.Series, b: pd.Series) -> pd.DataFrame:
+    '''
+    Counts of each pair of categories, like pd.crosstab, with a single bincount over
+    the categorical codes. Rows with a missing value and empty rows/columns are dropped.
+    '''
+    a = a if isinstance(a.dtype, pd.CategoricalDtype) else a.astype("category")
+    b = b if isinstance(b.dtype, pd.CategoricalDtype) else b.astype("category")
+    counts = contingency_counts(a.cat.codes.to_numpy(), len(a.cat.categories),
+                                b.cat.codes.to_numpy(), len(b.cat.categories))
+    return as_table(counts, pd.Index(a.cat.categories, name=a.name), pd.Index(b.cat.categories, name=b.name))
+
+def contingency_counts(codes_a, n_a, codes_b, n_b) -> np.ndarray:
+    '''
+    The n_a x n_b matrix of pair counts of two code arrays, with one bincount.
+    Pairs with a -1 (missing) code are skipped.
+    '''
+    valid = (codes_a >= 0) & (codes_b >= 0)
+    pairs = codes_a[valid].astype(np.int64) * n_b + codes_b[valid]
+    return np.bincount(pairs, minlength=n_a * n_b).reshape(n_a, n_b)
+
+def as_table(counts, index, columns) -> pd.DataFrame:
+    '''
+    Label a count matrix and drop its empty rows and columns.
+    '''
+    table = pd.DataFrame(counts, index=index, columns=columns)
+    return table.loc[counts.sum(axis=1) > 0, counts.sum(axis=0) > 0]
+
+def chi2_tests(tables) -> pd.DataFrame:
+    '''
+    Chi-square independence tests of several contingency tables, like
+    scipy.stats.chi2_contingency (Yates' correction when there is one degree of
+    freedom), with all p-values from one vectorized call.
+    Tables must not have empty rows or columns, see as_table.
+    '''
+    stats, dofs = [], []
+    for table in tables:
+        observed = np.asarray(table, dtype=float)
+        if observed.size == 0:
+            stats.append(np.nan)
+            dofs.append(0)
+            continue
+        expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / observed.sum()
+        dof = (observed.shape[0] - 1) * (observed.shape[1] - 1)
+        if dof == 1:
+            diff = expected - observed
+            observed = observed + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+        stats.append(((observed - expected) ** 2 / expected).sum() if dof else 0.0)
+        dofs.append(dof)
+    stats, dofs = np.array(stats), np.array(dofs)
+    p_values = np.where(dofs > 0, chi2.sf(stats, np.maximum(dofs, 1)), 1.0)
+    p_values[np.isnan(stats)] = np.nan
+    return pd.DataFrame({
+        "Test Statistic": stats,
+        "p-value": p_values,
+        "Degree of Freedom": dofs,
+    })
@@ -0,0 +1,266 @@
+import hashlib
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from module.utils import classify_dtype, CAT_THRESHOLD
+from module.distinct_counter import DistinctCounter
+from module.category_codes import compress_codes
+from module.time_parts import TimeParts
+from module.numeric_summary import numeric_summary
+from module.quantile_sketch import QuantileSketch
+
+class ColumnProfile:
+    '''
+    Metadata of one column.
+
+    The dtype class only needs to know whether a numeric column has fewer than
+    CAT_THRESHOLD distinct values, so it is decided by an approximate distinct
+    counter that stops as soon as the threshold is passed. value_counts and the
+    full distinct count are computed by the ProfileStore on first use.
+    '''
+    def __init__(self, series: pd.Series):
+        self.name = series.name
+        self.length = len(series)
+        self.null_count = int(series.isna().sum())
+        self.distinct, self.distinct_complete = None, False
+        n_unique = None
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_datetime64_any_dtype(series):
+            self.distinct, self.distinct_complete = DistinctCounter.scan(series, stop_above=CAT_THRESHOLD)
+            n_unique = self.distinct.count()
+        self.dtype_class = classify_dtype(series, n_unique=n_unique)
+        self.min, self.max = self._bounds(series)
+        self.value_counts = None  # computed on first use, see ProfileStore.value_counts
+        self.fingerprint = None  # computed on first use, see ProfileStore.fingerprint
+        self.numeric_summary = {}  # by exactness, computed on first use, see ProfileStore.numeric_summary
+        self.codes = None  # computed on first use, see ProfileStore.codes
+        self.top_k = {}  # by K, computed on first use, see ProfileStore.top_k
+        self.time_parts = None  # computed on first use, see ProfileStore.time_parts
+        self.ranks = None  # computed on first use, see ProfileStore.ranks
+
+    def _bounds(self, series):
+        if self.dtype_class == 'categorical' and not pd.api.types.is_numeric_dtype(series):
+            return None, None
+        if self.null_count == self.length:
+            return None, None
+        return series.min(), series.max()
+
+    @property
+    def missing_ratio(self) -> float:
+        return self.null_count / self.length if self.length else 0.0
+
+class ProfileStore:
+    '''
+    Lazily computed profiles of the columns of one DataFrame.
+
+    DataFrames in the session are replaced, never modified in place, so a
+    profile stays valid for as long as the frame it was computed on is alive.
+    '''
+    _stores = {}
+    _lock = threading.Lock()
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = weakref.ref(df)
+        self._profiles = {}
+        self._sketches = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def of(cls, df: pd.DataFrame) -> "ProfileStore":
+        '''
+        Get the store of a DataFrame, creating it on first use.
+        '''
+        key = id(df)
+        with cls._lock:
+            store = cls._stores.get(key)
+            if store is None or store._df() is not df:
+                store = cls(df)
+                cls._stores[key] = store
+                weakref.finalize(df, cls._discard, key, store)
+        return store
+
+    @classmethod
+    def _discard(cls, key, store):
+        with cls._lock:
+            if cls._stores.get(key) is store:
+                del cls._stores[key]
+
+    def get(self, col) -> ColumnProfile:
+        with self._lock:
+            profile = self._profiles.get(col)
+        if profile is None:
+            profile = ColumnProfile(self._df()[col])
+            with self._lock:
+                profile = self._profiles.setdefault(col, profile)
+        return profile
+
+    def value_counts(self, col) -> pd.Series:
+        '''
+        Exact counts of the distinct values of a column.
+        '''
+        profile = self.get(col)
+        if profile.value_counts is None:
+            counts = self._df()[col].value_counts(dropna=True)
+            profile.value_counts = counts[counts > 0]  # categories that never occur are listed with 0
+        return profile.value_counts
+
+    def distinct_exceeds(self, col, threshold) -> bool:
+        '''
+        Whether a column has more than `threshold` distinct values, approximately.
+        Stops reading the column as soon as the answer is known.
+        '''
+        profile = self.get(col)
+        if profile.distinct is not None and (profile.distinct_complete or profile.distinct.count() > threshold):
+            return profile.distinct.count() > threshold
+        counter, complete = DistinctCounter.scan(self._df()[col], stop_above=threshold)
+        if complete or profile.distinct is None or counter.count() > profile.distinct.count():
+            profile.distinct, profile.distinct_complete = counter, complete
+        return counter.count() > threshold
+
+    def distinct_count(self, col) -> int:
+        '''
+        Approximate number of distinct values of a column.
+        '''
+        profile = self.get(col)
+        if not profile.distinct_complete:
+            profile.distinct, profile.distinct_complete = DistinctCounter.scan(self._df()[col])
+        return profile.distinct.count()
+
+    def codes(self, col):
+        '''
+        The factorized column: integer codes (-1 where missing) and the distinct values.
+        '''
+        profile = self.get(col)
+        if profile.codes is None:
+            codes, uniques = pd.factorize(self._df()[col], use_na_sentinel=True)
+            if len(uniques) < np.iinfo(np.int32).max:
+                codes = codes.astype(np.int32)
+            profile.codes = codes, uniques
+        return profile.codes
+
+    def top_k(self, col, k: int = 10):
+        '''
+        Codes of a column compressed to its top-K values and "Others", with the categories.
+        '''
+        profile = self.get(col)
+        if k not in profile.top_k:
+            profile.top_k[k] = compress_codes(*self.codes(col), k)
+        return profile.top_k[k]
+
+    def time_parts(self, col) -> TimeParts:
+        '''
+        Calendar components of a datetime column.
+        '''
+        profile = self.get(col)
+        if profile.time_parts is None:
+            profile.time_parts = TimeParts(self._df()[col])
+        return profile.time_parts
+
+    def ranks(self, col) -> np.ndarray:
+        '''
+        Average ranks of the values of a column, NaN where missing.
+        '''
+        profile = self.get(col)
+        if profile.ranks is None:
+            profile.ranks = self._df()[col].rank(method='average').to_numpy(dtype=float, na_value=np.nan)
+        return profile.ranks
+
+    def fingerprint(self, col) -> str:
+        '''
+        Content hash of the values, their order and the index of a column.
+        '''
+        profile = self.get(col)
+        if profile.fingerprint is None:
+            series = self._df()[col]
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(str(series.dtype).encode())
+            digest.update(pd.util.hash_pandas_object(series, index=True).values.tobytes())
+            profile.fingerprint = digest.hexdigest()
+        return profile.fingerprint
+
+    def numeric_summary(self, col, exact=True) -> pd.DataFrame:
+        '''
+        Summary statistics of a numerical column, with quantiles from its sketch if not `exact`.
+        '''
+        profile = self.get(col)
+        if exact not in profile.numeric_summary:
+            sketch = None if exact else self.sketch(col)
+            profile.numeric_summary[exact] = numeric_summary(self._df()[col], sketch)
+        return profile.numeric_summary[exact]
+
+    def sketch(self, col) -> QuantileSketch:
+        '''
+        Quantile sketch of a numerical column.
+        '''
+        with self._lock:
+            sketch = self._sketches.get(col)
+        if sketch is None:
+            sketch = QuantileSketch.from_values(self._df()[col].to_numpy(dtype=float, na_value=np.nan))
+            with self._lock:
+                sketch = self._sketches.setdefault(col, sketch)
+        return sketch
+
+    def set_sketches(self, sketches: dict):
+        '''
+        Attach sketches built elsewhere, e.g. while loading the data chunk by chunk.
+        '''
+        columns = self._df().columns
+        with self._lock:
+            self._sketches.update({col: sketch for col, sketch in sketches.items() if col in columns})
+
+    def carry_over(self, new_df: pd.DataFrame, changed) -> "ProfileStore":
+        '''
+        Reuse the profiles of the columns that `new_df` did not change.
+        '''
+        store = ProfileStore.of(new_df)
+        with self._lock:
+            kept = {col: p for col, p in self._profiles.items() if col in new_df.columns and col not in changed}
+            sketches = {col: s for col, s in self._sketches.items() if col in new_df.columns and col not in changed}
+        with store._lock:
+            for col, profile in kept.items():
+                store._profiles.setdefault(col, profile)
+            for col, sketch in sketches.items():
+                store._sketches.setdefault(col, sketch)
+        return store
+
+def get_profile(df: pd.DataFrame, col) -> ColumnProfile:
+    return ProfileStore.of(df).get(col)
+
+def get_value_counts(df: pd.DataFrame, col) -> pd.Series:
+    return ProfileStore.of(df).value_counts(col)
+
+def distinct_exceeds(df: pd.DataFrame, col, threshold) -> bool:
+    return ProfileStore.of(df).distinct_exceeds(col, threshold)
+
+def get_distinct_count(df: pd.DataFrame, col) -> int:
+    return ProfileStore.of(df).distinct_count(col)
+
+def get_codes(df: pd.DataFrame, col):
+    return ProfileStore.of(df).codes(col)
+
+def get_top_k(df: pd.DataFrame, col, k: int = 10):
+    return ProfileStore.of(df).top_k(col, k)
+
+def get_time_parts(df: pd.DataFrame, col) -> TimeParts:
+    return ProfileStore.of(df).time_parts(col)
+
+def get_ranks(df: pd.DataFrame, col) -> np.ndarray:
+    return ProfileStore.of(df).ranks(col)
+
+def get_fingerprint(df: pd.DataFrame, col) -> str:
+    return ProfileStore.of(df).fingerprint(col)
+
+def get_numeric_summary(df: pd.DataFrame, col, exact=True) -> pd.DataFrame:
+    return ProfileStore.of(df).numeric_summary(col, exact)
+
+def get_quantiles(df: pd.DataFrame, col, q, exact=True):
+    '''
+    Quantile(s) of a column, exact or from its sketch.
+    '''
+    if exact:
+        return df[col].quantile(q)
+    return ProfileStore.of(df).sketch(col).quantile(q)
+
+def columns_of_type(df: pd.DataFrame, dtype_class) -> list:
+    store = ProfileStore.of(df)
+    return [col for col in df.columns if store.get(col).dtype_class == dtype_class]
@@ -1,24 +1,334 @@
+import os
+import numpy as np
 import pandas as pd
 import streamlit as st
+from pandas.api.types import union_categoricals
+from module.quantile_sketch import QuantileSketch
+from module.distinct_counter import DistinctCounter
+from module.downcast import downcast_series
+
+# supported file suffixes, mapped to (format, compression)
+FILE_FORMATS = {
+    ".csv": ("csv", None),
+    ".csv.gz": ("csv", "gzip"),
+    ".csv.zst": ("csv", "zstd"),
+    ".parquet": ("parquet", None),
+    ".pq": ("parquet", None),
+    ".feather": ("feather", None),
+    ".arrow": ("feather", None),
+    ".ipc": ("feather", None),
+}
+
+# share of a column's rows a date format must parse for the column to be cast to datetime
+DATE_THRESHOLD = 0.9
 
 class DataLoader:
-    def __init__(self, data):
+    def __init__(self, data, encode_categories=False, downcast=False, float_tolerance=None):
         self.data = data
         self.common_date_formats = [
-            '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', 
+            '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d',
             '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S',
             '%d.%m.%Y', '%m.%d.%Y',
         ]
+        # number of values used to probe cast rules before converting a full column
+        self.probe_size = 1000
+        self.probe_margin = 0.05
+        # quantile sketches of the numeric columns, filled by load_data_chunked
+        self.sketches = {}
+        # store text columns with at most this share of distinct values as category
+        self.encode_categories = encode_categories
+        self.category_ratio = 0.5
+        # store numeric columns in the narrowest type that keeps their values, and floats as
+        # float32 if float_tolerance is given and no value moves by more than that relative error
+        self.downcast = downcast
+        self.float_tolerance = float_tolerance
+        # memory of every column before and after encoding/downcasting, filled when either is set
+        self.memory_report = None
+
+    @staticmethod
+    def detect_format(name):
+        '''
+        Detect the file format and compression from a file name.
+        Returns (format, compression), or (None, None) if the file type is not supported.
+        '''
+        name = str(name).lower()
+        for suffix, (file_format, compression) in FILE_FORMATS.items():
+            if name.endswith(suffix):
+                return file_format, compression
+        return None, None
 
     # @st.cache_data
-    def load_data(self, file) -> pd.DataFrame:
+    def load_data(self, file, columns=None) -> pd.DataFrame:
         '''
-        Load data from a CSV file.
+        Load data from a CSV, compressed CSV, Parquet or Feather/Arrow IPC file.
+        Columnar files keep their stored types, so only CSV goes through cast_object.
+        Text columns are then dictionary-encoded if encode_categories is set, and
+        numeric columns narrowed if downcast is set.
+        Args:
+            file: a path or a file-like object with a `name`
+            columns (list): the columns to read, all columns if None
         '''
-        self.data = pd.read_csv(file)
-        self.cast_object()
+        file_format, compression = self.detect_format(getattr(file, "name", file))
+        if file_format == "parquet":
+            self.data = pd.read_parquet(file, columns=columns, memory_map=True)
+        elif file_format == "feather":
+            self.data = self._read_feather(file, columns)
+        else:
+            self.data = pd.read_csv(file, usecols=columns, compression=compression or "infer")
+            self.cast_object()
+        before = {}
+        if self.encode_categories:
+            before.update(self.encode_text_columns())
+        if self.downcast:
+            before.update(self.downcast_numeric())
+        if self.encode_categories or self.downcast:
+            self.memory_report = self._memory_report(before)
         return self.data
-    
+
+    def scan_header(self, file, sample_rows=1000) -> pd.DataFrame:
+        '''
+        Infer the column types from the header and a small sample, without loading the file.
+        Columnar files only have their schema read.
+        Returns a DataFrame with the "column" names and their inferred "type".
+        '''
+        file_format, compression = self.detect_format(getattr(file, "name", file))
+        position = None if isinstance(file, (str, os.PathLike)) else file.tell()
+        try:
+            if file_format == "parquet":
+                import pyarrow.parquet as pq
+                sample = pq.read_schema(file).empty_table().to_pandas()
+            elif file_format == "feather":
+                import pyarrow as pa
+                sample = pa.ipc.open_file(file).schema.empty_table().to_pandas()
+            else:
+                loader = DataLoader(pd.read_csv(file, nrows=sample_rows, compression=compression or "infer"))
+                loader.cast_object()
+                sample = loader.data
+        finally:
+            if position is not None:
+                file.seek(position)
+
+        return pd.DataFrame({
+            "column": sample.columns,
+            "type": [str(dtype) for dtype in sample.dtypes],
+        })
+
+    @staticmethod
+    def _read_feather(file, columns=None) -> pd.DataFrame:
+        from pyarrow import feather
+
+        if isinstance(file, (str, os.PathLike)):
+            # memory-map files on disk so that only the projected columns are read
+            return feather.read_table(file, columns=columns, memory_map=True).to_pandas()
+        return feather.read_table(file, columns=columns).to_pandas()
+
+    def load_data_chunked(self, file, columns=None, chunksize=100_000, sample_rows=10_000, progress=None) -> pd.DataFrame:
+        '''
+        Load data from a CSV file chunk by chunk.
+
+        The cast rules are inferred once from the first `sample_rows` rows and then
+        applied to every chunk as it is read, so the raw object columns never exist
+        for the whole file at once. A quantile sketch of every numeric column is built
+        chunk by chunk on the way and left in `self.sketches`. If encode_categories is
+        set, the text columns picked on the sample are encoded chunk by chunk too.
+        If downcast is set, every numeric column is narrowed once it is assembled.
+        Args:
+            file: a path or a binary file-like object, optionally gzip/zstd compressed
+            columns (list): the columns to read, all columns if None
+            chunksize (int): the number of rows parsed per chunk
+            sample_rows (int): the number of rows used to infer the cast rules
+            progress (callable): optional callback receiving the fraction of the file read
+        '''
+        _, compression = self.detect_format(getattr(file, "name", file))
+        handle = open(file, 'rb') if isinstance(file, (str, os.PathLike)) else file
+        try:
+            total = self._file_size(handle)
+            sample = pd.read_csv(handle, nrows=sample_rows, usecols=columns, compression=compression)
+            handle.seek(0)
+
+            rules = self.infer_cast_rules(sample)
+            # columns read as numbers in the sample must still be numbers in every chunk
+            for col in sample.columns:
+                if pd.api.types.is_numeric_dtype(sample[col]) and not pd.api.types.is_bool_dtype(sample[col]):
+                    rules[col] = ("numeric", None)
+            # keep every text column as raw strings so that all chunks share one schema
+            text_cols = {col: object for col in sample.columns if sample[col].dtype == "object"}
+            pieces = {col: [] for col in sample.columns}
+            self.sketches = {}
+            encoded = set()
+            if self.encode_categories:
+                encoded = {col for col in text_cols if col not in rules and self._is_category_candidate(sample[col])}
+            before_bytes = {col: 0 for col in encoded}
+
+            reader = pd.read_csv(
+                handle, chunksize=chunksize, usecols=columns, dtype=text_cols, compression=compression
+            )
+            fallen = []
+            # parsed values and rows of every datetime column, checked against the threshold at the end
+            dates = {col: [0, 0] for col, (kind, _) in rules.items() if kind == "datetime"}
+            for chunk in reader:
+                for col in chunk.columns:
+                    piece = self._apply_cast_rule(chunk[col], rules)
+                    if piece is None:
+                        # the column broke its numeric rule, it is read again as text below
+                        fallen.append(col)
+                        pieces[col] = None
+                        self.sketches.pop(col, None)
+                    if pieces[col] is None:
+                        continue
+                    if col in dates:
+                        dates[col][0] += piece.notna().sum()
+                        dates[col][1] += len(piece)
+                    if col in encoded:
+                        before_bytes[col] += piece.memory_usage(index=False, deep=True)
+                        piece = piece.astype("category")
+                    pieces[col].append(piece)
+                    self._update_sketch(col, piece)
+                if progress is not None and total:
+                    progress(min(handle.tell() / total, 1.0))
+            for col, (parsed, rows) in dates.items():
+                # the format of the sample coerces the rest of the file to NaT, a single pass keeps it as text
+                if rows and parsed / rows <= DATE_THRESHOLD:
+                    del rules[col]
+                    fallen.append(col)
+                    pieces[col] = None
+            if fallen:
+                handle.seek(0)
+                raw = pd.read_csv(handle, usecols=fallen, dtype=object, compression=compression)
+                for col in fallen:
+                    # the last step of cast_object, the numeric cast already failed
+                    pieces[col] = [self.try_cast_datetime(raw.pop(col))]
+        finally:
+            if handle is not file:
+                handle.close()
+
+        if not any(pieces.values()):
+            self.data = sample
+            return self.data
+
+        # assemble column by column so that only one column is duplicated at a time
+        columns = {}
+        for col in list(pieces):
+            if col in encoded:
+                # the chunks have different categories, union them instead of falling back to object
+                columns[col] = pd.Series(union_categoricals(pieces.pop(col)), name=col)
+            else:
+                columns[col] = pd.concat(pieces.pop(col), ignore_index=True)
+            if self.downcast:
+                narrowed = downcast_series(columns[col], self.float_tolerance)
+                if narrowed is not columns[col]:
+                    before_bytes[col] = columns[col].memory_usage(index=False, deep=False)
+                    columns[col] = narrowed
+        self.data = pd.DataFrame(columns)
+        if self.encode_categories or self.downcast:
+            self.memory_report = self._memory_report(before_bytes)
+        return self.data
+
+    def _update_sketch(self, col, piece: pd.Series):
+        if pd.api.types.is_numeric_dtype(piece) and not pd.api.types.is_bool_dtype(piece):
+            chunk_sketch = QuantileSketch.from_values(piece.to_numpy(dtype=float, na_value=np.nan))
+            self.sketches.setdefault(col, QuantileSketch()).merge(chunk_sketch)
+        else:
+            # the column is not numeric, or fell back to object on this chunk
+            self.sketches.pop(col, None)
+
+    def infer_cast_rules(self, sample: pd.DataFrame) -> dict:
+        '''
+        Infer how every object column should be cast from a sample of the data.
+        Returns a dict mapping column names to ("numeric", None) or ("datetime", format).
+        '''
+        rules = {}
+        for col in sample.columns:
+            series = sample[col]
+            if series.dtype != "object":
+                continue
+            if self.try_cast_numeric(series).dtype != "object":
+                rules[col] = ("numeric", None)
+                continue
+            date_format, _ = self._select_date_format(series)
+            if date_format is not None:
+                rules[col] = ("datetime", date_format)
+        return rules
+
+    def _apply_cast_rule(self, series: pd.Series, rules: dict):
+        '''
+        Cast one chunk of a column with the rule inferred from the sample.
+        If a chunk breaks a numeric rule, the rule is dropped and None is returned:
+        the chunks converted so far have lost their original text (e.g. "007"), so
+        the caller reads the whole column again as strings, like a single-pass read.
+        Datetime chunks are coerced, the caller checks the share of parsed values
+        of the whole column once every chunk is read.
+        '''
+        rule = rules.get(series.name)
+        if rule is None or series.dtype != "object":
+            return series.copy()  # detach from the chunk so it can be released
+
+        kind, date_format = rule
+        if kind == "datetime":
+            return pd.to_datetime(series, format=date_format, errors="coerce")
+
+        numeric = self.try_cast_numeric(series)
+        if numeric.dtype == "object":
+            del rules[series.name]
+            return None
+        return numeric
+
+    @staticmethod
+    def _file_size(handle) -> int:
+        position = handle.tell()
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        handle.seek(position)
+        return size
+
+    def _is_category_candidate(self, series: pd.Series) -> bool:
+        '''
+        Whether a text column repeats its values enough to be worth storing as category.
+        '''
+        if series.dtype != "object":
+            return False
+        return not DistinctCounter.exceeds(series, self.category_ratio * series.count())
+
+    def encode_text_columns(self):
+        '''
+        Convert the low-cardinality text columns to category, so that they are stored
+        and counted as integer codes instead of Python strings.
+        Returns the memory the converted columns used before.
+        '''
+        before = {}
+        for col in self.data.columns:
+            if self._is_category_candidate(self.data[col]):
+                before[col] = self.data[col].memory_usage(index=False, deep=True)
+                self.data[col] = self.data[col].astype("category")
+        return before
+
+    def downcast_numeric(self) -> dict:
+        '''
+        Narrow every numeric column to the smallest type that keeps its values, with
+        nullable integers for whole-number columns that have missing values.
+        Returns the memory the narrowed columns used before.
+        '''
+        before = {}
+        for col in self.data.columns:
+            series = self.data[col]
+            narrowed = downcast_series(series, self.float_tolerance)
+            if narrowed is not series:
+                before[col] = series.memory_usage(index=False, deep=False)
+                self.data[col] = narrowed
+        return before
+
+    def _memory_report(self, before: dict) -> pd.DataFrame:
+        '''
+        Memory of every column, given the memory the encoded columns used as text.
+        '''
+        after = self.data.memory_usage(index=False, deep=True)
+        return pd.DataFrame({
+            "column": self.data.columns,
+            "type": [str(dtype) for dtype in self.data.dtypes],
+            "bytes before": [before.get(col, after[col]) for col in self.data.columns],
+            "bytes after": after.to_numpy(),
+        })
+
     def cast_object(self):
         '''
         Try to cast every oject column to numeric.
@@ -30,28 +340,102 @@ class DataLoader:
                 self.data[col] = self.try_cast_datetime(self.data[col])
 
     def try_cast_numeric(self, series: pd.Series) -> pd.Series:
-        cleaned = (
-            series.astype(str)
-            .str.replace(",", "", regex=False)  # remove ,
-            .str.replace("%", "", regex=False)  # remove %
-            .str.replace("$", "", regex=False)  # remove $
-        )
+        if self._holds_bools(series):
+            return series   # True/False are text to the string-based cast, not 1/0
+        # probe a sample first so that text columns are rejected without a full pass
+        clean = self._probe_numeric(self._probe_sample(series))
+        if clean is None:
+            return series
+
+        numeric = self._to_numeric(series, clean)
+        if numeric is None and not clean:
+            numeric = self._to_numeric(series, True)
+        return series if numeric is None else numeric  # return original series if casting fails
+
+    @staticmethod
+    def _holds_bools(series: pd.Series) -> bool:
+        '''
+        Whether an object column holds Python or numpy booleans, e.g. a boolean column with gaps.
+        '''
+        if series.dtype != "object":
+            return False
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+        if kind == "boolean":
+            return True
+        return kind.startswith("mixed") and series.map(lambda v: isinstance(v, (bool, np.bool_))).any()
+
+    def _probe_numeric(self, sample: pd.Series):
+        '''
+        Test the cleaning rules on a sample.
+        Returns whether "," "%" "$" have to be removed, or None if the sample cannot be cast.
+        '''
+        for clean in (False, True):
+            if self._to_numeric(sample, clean) is not None:
+                return clean
+        return None
 
+    def _to_numeric(self, series: pd.Series, clean: bool):
+        if clean:
+            series = series.astype(str).str.replace(r"[,%$]", "", regex=True)  # remove , % $
         try:
-            numeric = pd.to_numeric(cleaned, errors="raise")
-            return numeric
-        except Exception:
-            return series  # return original series if casting fails
-        
-    def try_cast_datetime(self, series: pd.Series, threshold = 0.9) -> pd.Series:
+            return pd.to_numeric(series, errors="raise")
+        except (ValueError, TypeError):
+            return None
+
+    def _probe_sample(self, series: pd.Series) -> pd.Series:
+        '''
+        Take evenly spaced non-missing values of the series for probing.
+        '''
+        values = series.dropna()
+        if len(values) > self.probe_size:
+            positions = np.linspace(0, len(values) - 1, self.probe_size).astype(int)
+            values = values.iloc[positions]
+        return values
+
+    def _probe_date_formats(self, series: pd.Series, threshold=DATE_THRESHOLD) -> list:
+        '''
+        Test every date format on a sample and keep the ones that parse the most of it.
+        Returns an empty list if the column clearly cannot reach the threshold.
+        '''
+        sample = self._probe_sample(series)
+        if len(sample) == 0:
+            return []
+
+        ratios = {
+            date_format: pd.to_datetime(sample, format=date_format, errors="coerce").notna().mean()
+            for date_format in self.common_date_formats
+        }
+        best_ratio = max(ratios.values())
+        # the success ratio of the full column also counts its missing values
+        expected_ratio = best_ratio * len(series.dropna()) / len(series)
+        if best_ratio == 0 or expected_ratio < threshold - self.probe_margin:
+            return []
+        return [date_format for date_format, ratio in ratios.items() if ratio == best_ratio]
+
+    def _select_date_format(self, series: pd.Series, threshold=DATE_THRESHOLD):
+        '''
+        Parse the full column with the formats that won the probe.
+        Returns the best format and the parsed series, or (None, series) if none reaches the threshold.
+        '''
+        best_format = None
         best_series = series
         max_success_ratio = 0.0
+        n_valid = series.notna().sum()
 
-        for date_format in self.common_date_formats:
+        for date_format in self._probe_date_formats(series, threshold):
             temp_series = pd.to_datetime(series, format=date_format, errors="coerce")
-            success_ratio = temp_series.notna().sum() / len(series)
+            n_parsed = temp_series.notna().sum()
+            success_ratio = n_parsed / len(series)
             if success_ratio > max_success_ratio:
+                best_format = date_format
                 best_series = temp_series
                 max_success_ratio = success_ratio
+            if n_parsed == n_valid:
+                break   # no other format can parse more
+
+        if max_success_ratio > threshold:
+            return best_format, best_series
+        return None, series
 
-        return best_series if max_success_ratio > threshold else series
\ No newline at end of file
+    def try_cast_datetime(self, series: pd.Series, threshold=DATE_THRESHOLD) -> pd.Series:
+        return self._select_date_format(series, threshold)[1]
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import tempfile
+import pandas as pd
+
+# bump this when the casting rules change so that stale entries are not reused
+CACHE_VERSION = 1
+
+class DatasetCache:
+    '''
+    Disk-backed cache of cast datasets, stored as Arrow IPC (Feather) files.
+    Entries are keyed by a content hash of the upload and evicted least recently
+    used first once the cache grows over `max_bytes`.
+    '''
+    def __init__(self, cache_dir=None, max_bytes=5 * 1024 ** 3):
+        self.cache_dir = cache_dir or os.environ.get(
+            "AUTODM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "autodm")
+        )
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def content_hash(file, block_size=1 << 20) -> str:
+        '''
+        Hash a path or a binary file-like object block by block.
+        '''
+        digest = hashlib.blake2b(digest_size=20)
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'rb') as handle:
+                for block in iter(lambda: handle.read(block_size), b''):
+                    digest.update(block)
+        else:
+            position = file.tell()
+            file.seek(0)
+            for block in iter(lambda: file.read(block_size), b''):
+                digest.update(block)
+            file.seek(position)
+        return digest.hexdigest()
+
+    def key(self, content_hash, **options) -> str:
+        '''
+        Combine the content hash with the loading options that change the result.
+        '''
+        salt = repr((CACHE_VERSION, sorted(options.items())))
+        return hashlib.blake2b(f"{content_hash}:{salt}".encode(), digest_size=20).hexdigest()
+
+    def _path(self, key) -> str:
+        return os.path.join(self.cache_dir, f"{key}.arrow")
+
+    def get(self, key):
+        '''
+        Return the cached DataFrame, or None on a miss.
+        '''
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            data = pd.read_feather(path)
+            os.utime(path)  # mark as recently used
+            return data
+        except Exception:
+            self._remove(path)
+            return None
+
+    def put(self, key, data: pd.DataFrame) -> bool:
+        '''
+        Store the DataFrame and evict old entries. Returns False if the frame cannot be
+        written as Arrow (e.g. object columns with mixed types), in which case it is not cached.
+        '''
+        path = self._path(key)
+        # a unique temp file per writer, so sessions caching the same upload never share one
+        handle, temp_path = tempfile.mkstemp(suffix=".tmp", prefix=f"{key}.", dir=self.cache_dir)
+        os.close(handle)
+        try:
+            data.to_feather(temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            self._remove(temp_path)
+            return False
+        self._evict()
+        return True
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".arrow"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
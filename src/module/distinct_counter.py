@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+class DistinctCounter:
+    '''
+    Mergeable approximate distinct counter (HyperLogLog).
+
+    Values are hashed with pandas' hash_pandas_object. Up to `exact_limit`
+    distinct hashes are kept as they are, so small cardinalities are exact; past
+    that only 2**precision one-byte registers remain, with a standard error of
+    about 1.04 / sqrt(2**precision) (0.8% for the default precision of 14).
+    '''
+    def __init__(self, precision: int = 14, exact_limit: int = 1024):
+        self.precision = precision
+        self.exact_limit = exact_limit
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    @classmethod
+    def scan(cls, series: pd.Series, stop_above=None, chunk_size: int = 1 << 20):
+        '''
+        Count the distinct values of a series chunk by chunk.
+        Stops as soon as the count exceeds `stop_above`, since it can only grow.
+        Returns the counter and whether it saw the whole series.
+        '''
+        counter = cls()
+        for start in range(0, len(series), chunk_size):
+            counter.update(series.iloc[start:start + chunk_size])
+            if stop_above is not None and counter.count() > stop_above:
+                return counter, start + chunk_size >= len(series)
+        return counter, True
+
+    @classmethod
+    def exceeds(cls, series: pd.Series, threshold) -> bool:
+        '''
+        Whether the series has more than `threshold` distinct values.
+        '''
+        return cls.scan(series, stop_above=threshold)[0].count() > threshold
+
+    def update(self, series: pd.Series) -> "DistinctCounter":
+        series = series.dropna()
+        if len(series) == 0:
+            return self
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        self._add_registers(hashes)
+        if self._hashes is not None:
+            if self._register_estimate() > 2 * self.exact_limit:
+                self._hashes = None  # clearly past the exact range, skip deduplicating the chunk
+            else:
+                self._hashes = pd.unique(np.concatenate([self._hashes, hashes]))
+                if len(self._hashes) > self.exact_limit:
+                    self._hashes = None
+        return self
+
+    def merge(self, other: "DistinctCounter") -> "DistinctCounter":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self._hashes is not None and other._hashes is not None:
+            self._hashes = pd.unique(np.concatenate([self._hashes, other._hashes]))
+            if len(self._hashes) > self.exact_limit:
+                self._hashes = None
+        else:
+            self._hashes = None
+        return self
+
+    def _add_registers(self, hashes):
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # rank = position of the leftmost 1-bit in the remaining bits
+        rank = np.full(len(rest), bits + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        # the remaining bits fit in a float64 exactly, so frexp gives floor(log2) + 1
+        _, exponent = np.frexp(rest[nonzero].astype(np.float64))
+        rank[nonzero] = (bits + 1 - exponent).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> float:
+        if self._hashes is not None:
+            return float(len(self._hashes))
+        return self._register_estimate()
+
+    def _register_estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small ranges
+        return float(estimate)
+
+    def count(self) -> int:
+        return int(round(self.estimate()))
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+def downcast_series(series: pd.Series, float_tolerance=None) -> pd.Series:
+    '''
+    Store a numeric column in the smallest type that keeps its values.
+
+    Integers, and floats that only hold whole numbers and missing values, get the
+    narrowest signed integer type that fits their range, nullable (Int8...Int64) if
+    values are missing. Other floats become float32 when `float_tolerance` is given
+    and no value moves by more than that relative error.
+    Returns the series unchanged if it cannot be narrowed.
+    '''
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(values)
+    present = values[~missing]
+    if len(present) == 0:
+        return series
+
+    if pd.api.types.is_integer_dtype(series) or np.all(np.mod(present, 1) == 0):
+        low, high = present.min(), present.max()
+        for int_type in INT_TYPES:
+            info = np.iinfo(int_type)
+            if info.min <= low and high <= info.max:
+                break
+        else:
+            return series  # whole numbers beyond int64 stay float
+        if missing.any():
+            return series.astype(pd.api.types.pandas_dtype(int_type.__name__.capitalize()))
+        if pd.api.types.is_integer_dtype(series):
+            return series.astype(int_type)
+        return pd.Series(present.astype(int_type), index=series.index, name=series.name)
+
+    if float_tolerance is not None and series.dtype == np.float64:
+        narrow = present.astype(np.float32)
+        with np.errstate(over="ignore", invalid="ignore"):
+            error = np.abs(narrow.astype(np.float64) - present)
+        finite = np.isfinite(present)
+        if np.all(np.isfinite(narrow[finite])) and np.all(error[finite] <= float_tolerance * np.abs(present[finite])):
+            return series.astype(np.float32)
+    return series
+
+def widen(series: pd.Series) -> pd.Series:
+    '''
+    Undo a narrow integer type before arithmetic that could overflow it, e.g. powers.
+    '''
+    if pd.api.types.is_integer_dtype(series) and series.dtype.itemsize < 8:
+        return series.astype("Int64" if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) else np.int64)
+    if series.dtype == np.float32:
+        return series.astype(np.float64)
+    return series
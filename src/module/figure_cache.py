@@ -0,0 +1,91 @@
+import io
+import threading
+from collections import OrderedDict
+import matplotlib.pyplot as plt
+
+# pyplot keeps global state, so figures drawn from several threads are drawn one at a time
+draw_lock = threading.Lock()
+
+# cached in place of the PNG when an analysis draws no figure, e.g. a high-cardinality column
+NO_FIGURE = b""
+
+class FigureCache:
+    '''
+    Thread-safe LRU cache of rendered figures stored as PNG bytes.
+
+    Keys describe everything a figure depends on (analysis type, column
+    fingerprints, hue, period), so the same figure is never drawn twice while
+    it fits in `max_bytes`. Analyses that draw no figure are cached too, as
+    NO_FIGURE, so they are not run again on every rerun.
+    '''
+    def __init__(self, max_bytes=256 * 1024 ** 2, dpi=100):
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self._images = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        '''
+        The PNG of a figure, or None if it is not cached or there is no figure.
+        '''
+        return self._lookup(key) or None
+
+    def _lookup(self, key):
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+            return png
+
+    def put(self, key, png: bytes):
+        '''
+        Cache the PNG of a figure, None if there is no figure.
+        '''
+        png = NO_FIGURE if png is None else png
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._total -= len(old)
+            if len(png) > self.max_bytes:
+                return
+            self._images[key] = png
+            self._total += len(png)
+            while self._total > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._total -= len(evicted)
+
+    def render(self, key, make_figure):
+        '''
+        Return the PNG of a figure, drawing it with `make_figure()` only on a miss.
+        Returns None if `make_figure()` returns no figure.
+        '''
+        png = self._lookup(key)
+        if png is not None:
+            return png or None
+
+        png = render_png(make_figure, self.dpi)
+        self.put(key, png)
+        return png
+
+def render_png(make_figure, dpi=100):
+    '''
+    Draw a figure with `make_figure()` and render it to PNG bytes, holding the draw lock.
+    Returns None if `make_figure()` returns no figure.
+    '''
+    with draw_lock:
+        fig = make_figure()
+        if fig is None:
+            return None
+        return figure_png(fig, dpi)
+
+def figure_png(fig, dpi=100) -> bytes:
+    '''
+    Render a figure to PNG bytes and close it.
+    '''
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
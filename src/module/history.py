@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import weakref
+import pandas as pd
+
+class StepDelta:
+    '''
+    What one step changed, enough to rebuild the frame before the step.
+
+    Only the columns the step changed or removed are kept in full. When the step
+    only removed rows, the removed rows of the other columns are kept instead.
+    Anything else (new or reordered rows) falls back to keeping every column.
+    '''
+    def __init__(self, old: pd.DataFrame, new: pd.DataFrame, action_desc: str = ""):
+        self.action_desc = action_desc
+        self.old_index = old.index
+        self.old_columns = list(old.columns)
+        self.added = [col for col in new.columns if col not in old.columns]
+        self.removed_rows = None
+
+        same_rows = old.index.equals(new.index)
+        kept_rows = None
+        if not same_rows and old.index.is_unique and new.index.is_unique:
+            kept = old.index.isin(new.index)
+            if kept.sum() == len(new):
+                kept_rows = kept
+
+        if same_rows:
+            changed = [col for col in old.columns if col not in new.columns or not old[col].equals(new[col])]
+        elif kept_rows is not None:
+            changed = [
+                col for col in old.columns
+                if col not in new.columns or not old.loc[kept_rows, col].equals(new.loc[old.index[kept_rows], col])
+            ]
+            unchanged = [col for col in old.columns if col not in changed]
+            self.removed_rows = old.loc[~kept_rows, unchanged]
+        else:
+            changed = self.old_columns
+
+        self.columns = old[changed]
+        self.spill_path = None
+        self._nbytes = int(self.columns.memory_usage(index=True, deep=True).sum())
+        if self.removed_rows is not None:
+            self._nbytes += int(self.removed_rows.memory_usage(index=True, deep=True).sum())
+        # the columns whose values differ between the two frames
+        self.touched = set(changed) | set(self.added)
+        if not same_rows:
+            self.touched |= set(old.columns) | set(new.columns)
+
+    @property
+    def nbytes(self) -> int:
+        '''
+        The memory held by the delta, 0 once it has been spilled.
+        '''
+        return 0 if self.spill_path is not None else self._nbytes
+
+    def spill(self, spill_dir):
+        '''
+        Move the stored columns and rows to disk.
+        '''
+        fd, path = tempfile.mkstemp(suffix=".pkl", dir=spill_dir)
+        os.close(fd)
+        pd.to_pickle((self.columns, self.removed_rows), path)
+        self.spill_path = path
+        self.columns, self.removed_rows = None, None
+
+    def restore(self, current: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Rebuild the frame before the step from the frame after it.
+        '''
+        columns, removed_rows = self.columns, self.removed_rows
+        if self.spill_path is not None:
+            columns, removed_rows = pd.read_pickle(self.spill_path)
+            os.remove(self.spill_path)
+
+        kept = [col for col in self.old_columns if col not in columns.columns]
+        if not kept:
+            return columns[self.old_columns]
+        frame = current[kept]
+        if removed_rows is not None:
+            frame = pd.concat([frame, removed_rows[kept]]).reindex(self.old_index)
+        frame = pd.concat([frame, columns.set_axis(frame.index)], axis=1)
+        return frame[self.old_columns]
+
+class DeltaHistory:
+    '''
+    Undo history storing a StepDelta per step instead of a copy of the whole frame.
+
+    Once the deltas in memory exceed `max_bytes`, the oldest ones are spilled
+    to a temporary directory, which is removed with the history.
+    '''
+    def __init__(self, max_bytes=1024 ** 3, spill_dir=None):
+        self.max_bytes = max_bytes
+        self._steps = []
+        self._spill_dir = spill_dir
+        self._finalizer = None
+
+    def __len__(self):
+        return len(self._steps)
+
+    def push(self, old: pd.DataFrame, new: pd.DataFrame, action_desc: str = "") -> StepDelta:
+        delta = StepDelta(old, new, action_desc)
+        self._steps.append(delta)
+        self._spill()
+        return delta
+
+    def pop(self, current: pd.DataFrame):
+        '''
+        Undo the last step. Returns the previous frame and the step's delta.
+        '''
+        delta = self._steps.pop()
+        return delta.restore(current), delta
+
+    def _spill(self):
+        total = sum(step.nbytes for step in self._steps)
+        # the latest step stays in memory so that undo is always fast
+        for step in self._steps[:-1]:
+            if total <= self.max_bytes:
+                break
+            nbytes = step.nbytes
+            if nbytes:
+                step.spill(self._get_spill_dir())
+                total -= nbytes
+
+    def _get_spill_dir(self):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="autodm-history-")
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        return self._spill_dir
+
+    def clear(self):
+        self._steps.clear()
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer, self._spill_dir = None, None
@@ -0,0 +1,104 @@
+from functools import cached_property
+import numpy as np
+import pandas as pd
+from scipy.signal import fftconvolve
+
+class NumericDistribution:
+    '''
+    Box statistics, histogram and KDE of a numeric column, computed with vectorized
+    NumPy so that plots are drawn from aggregates instead of raw rows. The box
+    statistics are computed up front, the histogram and KDE when first drawn.
+
+    The KDE is a Gaussian kernel (Scott's bandwidth) convolved with fine grid
+    counts through an FFT, which costs O(n + grid log grid) instead of O(n * grid).
+    '''
+    def __init__(self, values, grid_size: int = 1024, max_bins: int = 200, max_fliers: int = 500):
+        values = np.asarray(pd.Series(values).dropna(), dtype=float)
+        self.values = values[np.isfinite(values)]
+        self.n = len(self.values)
+        self.grid_size = grid_size
+        self.max_bins = max_bins
+        self.max_fliers = max_fliers
+        self.box = self._box_stats() if self.n else None
+
+    def _box_stats(self):
+        v = self.values
+        q1, median, q3 = np.quantile(v, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        inside = (v >= low) & (v <= high)
+        fliers = v[~inside]
+        if len(fliers) > self.max_fliers:
+            # keep evenly spaced fliers, the most extreme ones included
+            fliers = np.sort(fliers)
+            fliers = fliers[np.linspace(0, len(fliers) - 1, self.max_fliers).astype(int)]
+        self.min, self.max = v.min(), v.max()
+        return {
+            "med": median, "q1": q1, "q3": q3,
+            "whislo": v[inside].min() if inside.any() else q1,
+            "whishi": v[inside].max() if inside.any() else q3,
+            "fliers": fliers,
+        }
+
+    @cached_property
+    def histogram(self):
+        '''
+        The bin counts and edges, computed on first use.
+        '''
+        if self.n == 0:
+            return np.zeros(1), np.array([0.0, 1.0])
+        # Freedman-Diaconis bin width from the IQR that is already known
+        iqr = self.box["q3"] - self.box["q1"]
+        span = self.max - self.min
+        if span == 0:
+            n_bins = 1
+        elif iqr > 0:
+            n_bins = int(np.ceil(span / (2 * iqr * self.n ** (-1 / 3))))
+        else:
+            n_bins = int(np.ceil(np.sqrt(self.n)))
+        n_bins = min(max(n_bins, 1), self.max_bins)
+        return np.histogram(self.values, bins=n_bins)
+
+    @cached_property
+    def density(self):
+        '''
+        The KDE evaluated on a grid over the data range, computed on first use.
+        '''
+        if self.n < 2:
+            return np.array([]), np.array([])
+        bandwidth = self.values.std() * self.n ** (-1 / 5)
+        if bandwidth == 0:
+            return np.array([]), np.array([])
+        grid_counts, edges = np.histogram(self.values, bins=self.grid_size, range=(self.min, self.max))
+        step = edges[1] - edges[0]
+        half = int(np.ceil(4 * bandwidth / step))
+        offsets = np.arange(-half, half + 1) * step
+        kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+        grid = (edges[:-1] + edges[1:]) / 2
+        return grid, fftconvolve(grid_counts, kernel, mode="same") / self.n
+
+    def plot_hist(self, ax, color=None, kde=True, label=None):
+        '''
+        Draw the histogram, with the KDE scaled to counts like sns.histplot(kde=True).
+        '''
+        counts, edges = self.histogram
+        widths = np.diff(edges)
+        ax.bar(edges[:-1], counts, width=widths, align="edge",
+               color=color, alpha=0.6, edgecolor="white", linewidth=0.5, label=label)
+        if kde:
+            grid, kde_values = self.density
+            if len(grid):
+                ax.plot(grid, kde_values * self.n * widths.mean(), color=color)
+        ax.set_ylabel("Count")
+
+    def box_stats(self, label=None) -> dict:
+        return dict(self.box or {}, label=label)
+
+    def plot_box(self, ax, color=None):
+        '''
+        Draw the box plot from the precomputed statistics.
+        '''
+        if self.box is None:
+            return
+        ax.bxp([self.box_stats("")], patch_artist=True,
+               boxprops={"facecolor": color}, medianprops={"color": "black"})
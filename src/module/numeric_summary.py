@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+def numeric_summary(series: pd.Series, sketch=None) -> pd.DataFrame:
+    '''
+    Summarize a numerical column like pandas mean/std/min/max/median/quantile/skew,
+    but with all quantiles from a single partition and all moments from one set of
+    power sums, instead of one scan per statistic.
+    If a QuantileSketch is given, the quantiles are read from it instead of the data.
+    '''
+    values = np.asarray(series.dropna(), dtype=float)
+    n = len(values)
+    if n == 0:
+        minimum = q1 = median = q3 = maximum = mean = std = skew = np.nan
+    else:
+        quantiles = [0, 0.25, 0.5, 0.75, 1]
+        if sketch is not None:
+            minimum, q1, median, q3, maximum = sketch.quantile(quantiles)
+        else:
+            minimum, q1, median, q3, maximum = np.quantile(values, quantiles)
+
+        # power sums around the median keep the moments numerically stable
+        d = values - median
+        d2 = d * d
+        s1, s2, s3 = d.sum(), d2.sum(), d2 @ d
+        mean = median + s1 / n
+        shift = s1 / n
+        m2 = s2 / n - shift ** 2                                  # biased central moments
+        m3 = s3 / n - 3 * shift * s2 / n + 2 * shift ** 3
+        std = np.sqrt(m2 * n / (n - 1)) if n > 1 else np.nan
+        if n < 3:
+            skew = np.nan
+        elif m2 <= 0:
+            skew = 0.0
+        else:
+            # adjusted Fisher-Pearson coefficient, as in pd.Series.skew
+            skew = np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+
+    return pd.DataFrame({
+        'mean'  : [mean],
+        'std'   : [std],
+        'min'   : [minimum],
+        'max'   : [maximum],
+        'median': [median],
+        'Q1'    : [q1],
+        'Q3'    : [q3],
+        'IQR'   : [q3 - q1],
+        'range' : [maximum - minimum],
+        'skew'  : [skew]
+    })
@@ -0,0 +1,102 @@
+import numpy as np
+
+class QuantileSketch:
+    '''
+    Mergeable approximate quantile sketch (KLL).
+
+    Values are kept in levels of compactors: once a level holds more than its
+    capacity it is sorted and every other value, from a random offset, moves up
+    one level with twice the weight. Whatever the number of rows, a sketch keeps
+    at most 3k values, the sum of the level capacities, and in practice about k
+    (around 190 for k = 200), as compacting drains the levels below. Sketches
+    built on separate chunks can be merged.
+    The rank error is about 1.7 / k (roughly 1% for the default k = 200); a
+    larger k is more accurate and uses more memory.
+    '''
+    def __init__(self, k: int = 200, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_values(cls, values, k: int = 200, chunk_size: int = 1_000_000, seed=None) -> "QuantileSketch":
+        '''
+        Build a sketch from an array, feeding it chunk by chunk.
+        '''
+        sketch = cls(k, seed)
+        values = np.asarray(values, dtype=float)
+        for start in range(0, len(values), chunk_size):
+            sketch.update(values[start:start + chunk_size])
+        return sketch
+
+    def update(self, values) -> "QuantileSketch":
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        '''
+        Add the values summarized by another sketch to this one.
+        '''
+        if other.n == 0:
+            return self
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            even = len(items) - len(items) % 2
+            offset = self._rng.integers(2)
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset:even:2]])
+            self.levels[level] = items[even:]
+            # a new top level shrinks the capacity of the levels below, so check again from the bottom
+            level = 0
+
+    def quantile(self, q):
+        '''
+        Approximate quantile(s) for q in [0, 1], like pd.Series.quantile.
+        '''
+        scalar = np.ndim(q) == 0
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if self.n == 0:
+            result = np.full(len(q), np.nan)
+        else:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+            order = np.argsort(items)
+            items, cumulative = items[order], np.cumsum(weights[order])
+            index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+            result = items[np.clip(index, 0, len(items) - 1)]
+            # the extremes are tracked exactly
+            result[q <= 0] = self.min
+            result[q >= 1] = self.max
+        return result[0] if scalar else result
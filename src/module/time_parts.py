@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+NS_PER_SECOND = 10 ** 9
+SECONDS_PER_DAY = 86_400
+# proleptic Gregorian ordinal of 1970-01-01, as in datetime.toordinal
+EPOCH_ORDINAL = 719_163
+
+# finest to coarsest, the order granularity is reported in
+COMPONENTS = ['second', 'minute', 'hour', 'dayofweek', 'day', 'month', 'year']
+DAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+# coarser groups of the components with many values, as (bin edges, labels) like pd.cut
+BINS = {
+    'day': ([0, 7, 14, 21, 28, 32], ['1-7', '8-14', '15-21', '22-28', '29-31']),
+    'hour': ([-1, 3, 6, 9, 12, 15, 18, 21, 24], ['0-3', '4-6', '7-9', '10-12', '13-15', '16-18', '19-21', '22-24']),
+    'minute': ([-1, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60],
+               ['0-5', '6-10', '11-15', '16-20', '21-25', '26-30', '31-35', '36-40', '41-45', '46-50', '51-55', '56-60']),
+}
+BINS['second'] = BINS['minute']
+
+class TimeParts:
+    '''
+    Calendar components of a datetime column, all derived in one vectorized pass
+    over its int64 nanosecond view instead of one `.dt` accessor call each.
+
+    Every component is a full-length int array with -1 where the time is missing,
+    so that callers can select the rows they kept with a boolean mask.
+    '''
+    def __init__(self, series: pd.Series):
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_localize(None)  # components of the local wall time, like .dt
+        times = series.to_numpy(dtype='datetime64[ns]')
+        self.valid = ~np.isnat(times)
+
+        ns = np.where(self.valid, times.view(np.int64), 0)
+        days, rest = np.divmod(ns, SECONDS_PER_DAY * NS_PER_SECOND)
+        seconds = rest // NS_PER_SECOND
+        year, month, day = self._civil_from_days(days)
+        parts = {
+            'second': seconds % 60,
+            'minute': seconds // 60 % 60,
+            'hour': seconds // 3600,
+            'dayofweek': (days + 3) % 7,  # 1970-01-01 was a Thursday
+            'day': day,
+            'month': month,
+            'year': year,
+        }
+        self.days = np.where(self.valid, days, -1)
+        self.parts = {name: np.where(self.valid, values, -1).astype(np.int32) for name, values in parts.items()}
+
+    @staticmethod
+    def _civil_from_days(days):
+        '''
+        Year, month and day of days since 1970-01-01, after H. Hinnant's civil_from_days.
+        '''
+        z = days + 719_468
+        era = np.floor_divide(z, 146_097)
+        doe = z - era * 146_097
+        yoe = (doe - doe // 1460 + doe // 36_524 - doe // 146_096) // 365
+        doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+        mp = (5 * doy + 2) // 153
+        day = doy - (153 * mp + 2) // 5 + 1
+        month = np.where(mp < 10, mp + 3, mp - 9)
+        year = yoe + era * 400 + (month <= 2)
+        return year, month, day
+
+    @property
+    def granularity(self) -> list:
+        '''
+        The components that take more than one value, finest first.
+        '''
+        granularity = []
+        for name in COMPONENTS:
+            values = self.parts[name][self.valid]
+            if len(values) and values.min() != values.max():
+                granularity.append(name)
+        return granularity
+
+    def ordinal(self, rows=None) -> np.ndarray:
+        '''
+        Day numbers like datetime.toordinal, for the rows selected by a boolean mask.
+        '''
+        days = self.days if rows is None else self.days[rows]
+        return days + EPOCH_ORDINAL
+
+    def period(self, name, rows=None, binned=False) -> pd.Categorical:
+        '''
+        A component as an ordered categorical, for the rows selected by a boolean mask.
+        Days of the week are named, and with `binned` the day, hour, minute and second
+        are grouped like pd.cut over BINS. Categories may include values never seen.
+        '''
+        values = self.parts[name] if rows is None else self.parts[name][rows]
+        missing = values < 0
+        if binned and name in BINS:
+            edges, labels = BINS[name]
+            codes = np.searchsorted(edges, values, side='left') - 1
+        elif name == 'dayofweek':
+            codes, labels = values, DAY_NAMES
+        else:
+            present = values[~missing]
+            low = present.min() if len(present) else 0
+            high = present.max() if len(present) else -1
+            codes, labels = values - low, np.arange(low, high + 1)
+        codes = np.where(missing, -1, codes)
+        return pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+
+    def counts(self, name, rows=None, binned=False) -> pd.Series:
+        '''
+        Number of rows in each observed period of a component, in period order.
+        '''
+        period = self.period(name, rows, binned)
+        codes = period.codes
+        counts = np.bincount(codes[codes >= 0], minlength=len(period.categories))
+        counts = pd.Series(counts, index=period.categories, name='count')
+        return counts[counts > 0]
+
+    def means(self, name, values, rows=None, binned=False) -> pd.Series:
+        '''
+        Mean of `values` within each observed period of a component, in period order.
+        `values` are aligned with the selected rows.
+        '''
+        period = self.period(name, rows, binned)
+        codes = period.codes
+        values = np.asarray(values, dtype=float)
+        keep = codes >= 0
+        counts = np.bincount(codes[keep], minlength=len(period.categories))
+        sums = np.bincount(codes[keep], weights=values[keep], minlength=len(period.categories))
+        observed = counts > 0
+        return pd.Series(sums[observed] / counts[observed], index=period.categories[observed], name='mean')
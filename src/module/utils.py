@@ -1,15 +1,25 @@
 import pandas as pd
+from module.distinct_counter import DistinctCounter
 
-def classify_dtype(series, cat_threshold = 20):
-    series = series.dropna()
+# numeric columns with fewer distinct values than this are categorical
+CAT_THRESHOLD = 20
+
+def classify_dtype(series, cat_threshold = CAT_THRESHOLD, n_unique = None):
+    '''
+    Classify a column as datetime, numerical or categorical.
+    Pass `n_unique` when the distinct count is already known to skip counting.
+    '''
     if pd.api.types.is_datetime64_any_dtype(series):
         return 'datetime'
     elif pd.api.types.is_numeric_dtype(series):
-        if series.nunique() < cat_threshold:
+        if n_unique is None:
+            # only whether the count reaches the threshold matters, so stop counting there
+            n_unique = DistinctCounter.scan(series, stop_above=cat_threshold)[0].count()
+        if n_unique < cat_threshold:
             return 'categorical'
         else:
             return 'numerical'
     else:
         # Also include boolean and object types as categorical
         return 'categorical'
-    
\ No newline at end of file
+
@@ -0,0 +1,46 @@
+import time
+import streamlit as st
+from module.background import BackgroundRunner
+from page.session import get_scope
+
+# how often a page waiting for a task refreshes its progress bar
+POLL_SECONDS = 0.1
+
+@st.cache_resource
+def get_background() -> BackgroundRunner:
+    return BackgroundRunner()
+
+def run_in_background(name, key, fn, *args, text="Analysing...", speculative=()):
+    '''
+    Run `fn(task, *args)` in the background and wait for its result with a progress bar.
+
+    `name` groups the tasks of one view of this session: the tasks of the group with
+    another key, left over from earlier selections, are cancelled. `speculative` lists
+    (key, fn, *args) tuples of likely next views, started once this one is submitted.
+    Waiting keeps updating the page, so changing a widget stops this run right away.
+    The result is not kept by the runner once returned, reruns rely on the analyser
+    and figure caches instead.
+    '''
+    runner = get_background()
+    group = (get_scope(), name)
+    runner.keep_only(group, [key] + [spec[0] for spec in speculative])
+    task = runner.submit(group, key, fn, *args)
+    for spec_key, spec_fn, *spec_args in speculative:
+        runner.submit(group, spec_key, spec_fn, *spec_args, speculative=True)
+
+    if not task.done():
+        bar = st.progress(task.progress, text=text)
+        while not task.done():
+            time.sleep(POLL_SECONDS)
+            bar.progress(task.progress, text=text)
+        bar.empty()
+    return runner.take(task)
+
+def leave_page(page):
+    '''
+    Cancel the background work of this session when it switches to another page.
+    '''
+    previous = st.session_state.get("current_page")
+    st.session_state["current_page"] = page
+    if previous is not None and previous != page:
+        get_background().drop_scope(get_scope())
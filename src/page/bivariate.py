@@ -3,10 +3,14 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from page.session import get_df
+from page.session import get_df, get_scope
+from page.figures import get_figure_cache, show_png
+from page.background import run_in_background
 from module.EDAnalyser.Bivariate.CatTimeAnalyser import CatTimeAnalyser
-from module.utils import classify_dtype
+from module.column_profile import columns_of_type, get_fingerprint
 from module.EDAnalyser.AnalyserFactory import BivariateAnalyserFactory
+from module.EDAnalyser.CorrelationEngine import CorrelationEngine, order_columns, plot_correlation
+from module.EDAnalyser.AssociationScan import AssociationScan
 
 def page_bivariate_eda():
     st.title("Bivariate EDA")
@@ -16,10 +20,22 @@ def page_bivariate_eda():
     # correlation matrix
     expand = st.expander("Correlation Matrix")
     with expand:
-        corr_matrix = correlation_matrix(data)
-        st.pyplot(corr_matrix)
-        plt.close(corr_matrix)
+        numerical_cols = columns_of_type(data, "numerical")
+        method_col, view_col = st.columns(2)
+        with method_col:
+            method = st.radio("Method", ["pearson", "spearman"], horizontal=True, key="correlation_method")
+        with view_col:
+            view = st.radio("View", ["all", "clustered", "top"], horizontal=True, key="correlation_view",
+                            help="Clustered puts correlated columns together, top keeps the 20 most correlated columns.")
+        key = ("correlation_matrix", method, view) + tuple((c, get_fingerprint(data, c)) for c in numerical_cols)
+        show_png(run_in_background("correlation", key, draw_correlation, get_figure_cache(), key, data, numerical_cols,
+                                   method, view, get_scope(), text="Computing correlations..."))
     
+    # rank every pair, picking one fills the selectors below
+    expand = st.expander("Find Related Features")
+    with expand:
+        association_scan(data)
+
     # choose columns
     st.write("## Data Relationships Analysis")
     st.write("Select two features to compare their relationships.")
@@ -31,11 +47,40 @@ def page_bivariate_eda():
     with f2:
         col2 = st.selectbox("📌 Feature 2", data.columns, key="bivariate_col2")
     with h:
-        candidates = [c for c in data.columns if classify_dtype(data[c]) == "categorical"]
+        candidates = columns_of_type(data, "categorical")
         hue = st.selectbox("🌈 Hue", [None] + candidates, key="bivariate_hue", placeholder=None)
 
     show_relationship(col1, col2, hue)
 
+def association_scan(data):
+    '''
+    Rank every column pair by the strength of their relationship.
+    Selecting a pair opens it in the analysis below.
+    '''
+    method = st.radio("Numerical correlation", ["pearson", "spearman"], horizontal=True, key="association_method")
+    key = (get_scope(), method) + tuple((c, get_fingerprint(data, c)) for c in data.columns)
+    scans = st.session_state.setdefault("association_scans", {})
+    if st.button("Scan all pairs"):
+        result = run_in_background("association", key, scan_pairs, data, method, text="Scanning all pairs...")
+        scans.clear()   # only the latest version of the data is worth keeping
+        scans[key] = result
+    if key not in scans:
+        st.write("Scan to rank every pair of columns: |correlation| for numerical pairs, trend against time, "
+                 "correlation ratio (eta) against categories and Cramér's V between categories.")
+        return
+
+    result = scans[key]
+    event = st.dataframe(result.round(4), hide_index=True, use_container_width=True,
+                         on_select="rerun", selection_mode="single-row", key="association_table")
+    selected = event.selection.rows
+    if selected and st.session_state.get("association_opened") != (key, selected[0]):
+        # only apply a new selection, so that the selectors can still be changed by hand
+        st.session_state["association_opened"] = (key, selected[0])
+        pair = result.iloc[selected[0]]
+        st.session_state["bivariate_col1"] = pair["col1"]
+        st.session_state["bivariate_col2"] = pair["col2"]
+        st.session_state["bivariate_hue"] = None
+
 @st.cache_data
 def preview(data):
     st.write("## Data Preview")      
@@ -62,36 +107,63 @@ def show_relationship(f1, f2, hue):
         st.warning("Cannot enable label coloring while comparing with label column.")
         st.stop()
 
-    eda = BivariateAnalyserFactory.create(st.session_state["data"], f1, f2, hue)
-    analyse = eda.analyse() # type: ignore
+    # the analysis runs in the background, a new selection cancels the work of the old one
+    data, figures = st.session_state["data"], get_figure_cache()
+    key = ("relationship",) + tuple((c, None if c is None else get_fingerprint(data, c)) for c in (f1, f2, hue))
+    result = run_in_background("bivariate", key, analyse_pair, figures, data, f1, f2, hue, get_scope(),
+                               text=f"Analysing {f1} and {f2}...")
+    eda = result["eda"]
 
     # specialize for categorical vs datetime
     if isinstance(eda, CatTimeAnalyser):
-        period = eda.granularity 
-        period_tabs = st.tabs(period)
-        for p, period_tab in zip(period, period_tabs):
-            with period_tab:
-                analyse = eda.analyse_by_period(p)
-                if analyse["summary"] is not None:
-                    expand = st.expander(f"{p} Summary")
-                    with expand:
-                        st.dataframe(analyse["summary"])
-                if analyse["plot"] is not None:
-                    st.pyplot(analyse["plot"])
-                    plt.close(analyse["plot"])
+        period = eda.granularity
+        if period:
+            p = st.radio("Period", period, horizontal=True, key=f"bivariate_period_{f1}_{f2}")
+            analyse = eda.analyse_by_period(p, visualize=False)
+            if analyse["summary"] is not None:
+                expand = st.expander(f"{p} Summary")
+                with expand:
+                    st.dataframe(analyse["summary"])
+            # the other periods are drawn ahead, they are the likely next views
+            others = [(key + (other,), draw_period, figures, eda, other) for other in period if other != p]
+            show_png(run_in_background("bivariate_period", key + (p,), draw_period, figures, eda, p,
+                                       text=f"Drawing {p}...", speculative=others))
     else:
-        if analyse["summary"] is not None:
-            expand = st.expander(analyse["name"])
+        if result["summary"] is not None:
+            expand = st.expander(result["name"])
             with expand:
-                st.dataframe(analyse["summary"])
-        if analyse["plot"] is not None:
-            st.pyplot(analyse["plot"])
-            plt.close(analyse["plot"])
-
-def correlation_matrix(data):
-    numerical_cols = [c for c in data.columns if classify_dtype(data[c]) == "numerical"]
-    corr_matrix = data[numerical_cols].corr()
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(corr_matrix, annot=True, cmap="coolwarm")
-    plt.title("Correlation Matrix")
-    return plt.gcf()
\ No newline at end of file
+                st.dataframe(result["summary"])
+        show_png(result["png"])
+
+def analyse_pair(task, figures, data, f1, f2, hue, scope):
+    '''
+    Build the analyser of a pair, its summary and its figure, in a background task.
+    For categorical vs datetime, the chi-square tests of every period are computed together
+    and the figures are left to draw_period.
+    '''
+    eda = BivariateAnalyserFactory.create(data, f1, f2, hue, scope=scope)
+    task.step(0.3)
+    if isinstance(eda, CatTimeAnalyser):
+        return {"eda": eda, "summary": eda.summary_by_periods()}
+    analyse = eda.analyse(visualize=False)
+    task.step(0.6)
+    png = figures.render(eda.figure_key(), eda.visualize)
+    return {"eda": eda, "name": analyse["name"], "summary": analyse["summary"], "png": png}
+
+def draw_period(task, figures, eda, period):
+    return figures.render(eda.figure_key(period), lambda: eda.visualize_by_period(period))
+
+def scan_pairs(task, data, method):
+    return AssociationScan(data, method=method).run(step=task.step)
+
+def draw_correlation(task, figures, key, data, numerical_cols, method, view, scope):
+    '''
+    Draw the correlation heatmap; the matrix is computed before drawing, outside the draw lock.
+    '''
+    png = figures.get(key)
+    if png is not None:
+        return png
+    corr_matrix = CorrelationEngine.matrix(data, numerical_cols, method, scope=scope, step=task.step)
+    shown = order_columns(corr_matrix, view)
+    task.step()
+    return figures.render(key, lambda: plot_correlation(corr_matrix.loc[shown, shown], method))
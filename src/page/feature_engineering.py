@@ -1,8 +1,11 @@
 import streamlit as st
 from streamlit_sortables import sort_items
 import pandas as pd
-import matplotlib.pyplot as plt
 from page.session import get_df, confirm, undo
+from page.figures import show_png
+from page.background import run_in_background
+from module.column_profile import get_fingerprint, get_profile
+from module.figure_cache import render_png
 from module.FeatureProcessingHandler.MissingValuesHandler import MissingValuesHandler
 from module.FeatureProcessingHandler.CategoricalEncodingHandler import CategoricalEncodingHandler
 from module.FeatureProcessingHandler.NumericalHandler import NumericalHandler
@@ -18,16 +21,20 @@ def page_feature_engineering():
     if st.button("Undo", use_container_width=True):
         undo()
         st.rerun()
-    if data.isnull().values.any():
-        missing_values_handler(data)
+    exact = not st.toggle(
+        "Approximate quantiles", key="approximate_quantiles",
+        help="Read medians, percentiles and quartiles from quantile sketches instead of the full columns."
+    )
+    if any(get_profile(data, col).null_count for col in data.columns):
+        missing_values_handler(data, exact)
     categorical_encoding_handler(data)
-    numerical_handler(data)
+    numerical_handler(data, exact)
     
 
-def missing_values_handler(data):
+def missing_values_handler(data, exact=True):
     st.markdown("## Missing Values")
     st.write("Let's check for missing values in the data. Choose a column to view the missing values and decide how to handle them.")
-    missing_values_handler = MissingValuesHandler(data)
+    missing_values_handler = MissingValuesHandler(data, exact)
     target_col, method = build_missing_current_status(missing_values_handler)
     if target_col != 'None':
         if st.button("Confirm Imputation", use_container_width=True):
@@ -41,9 +48,7 @@ def build_missing_current_status(missing_values_handler: MissingValuesHandler):
     # Draw the missing values plot
     expand = st.expander("Missing Values Plot")
     with expand:
-        plot = missing_values_handler.plot_missing_values()
-        st.pyplot(plot)
-        plt.close(plot)
+        show_png(render_png(missing_values_handler.plot_missing_values))
 
     # column & method
     sug = missing_values_handler.suggest_imputation()
@@ -66,9 +71,9 @@ def build_missing_current_status(missing_values_handler: MissingValuesHandler):
         
         # show impute preview if method id not "drop column"
         if selected_method != 'drop column' or selected_col != 'drop row':
-            impute_preview = missing_values_handler.impute_plot_preview(selected_col, selected_method)
-            st.pyplot(impute_preview)
-            plt.close(impute_preview)
+            key = preview_key(missing_values_handler.df, selected_col, selected_method, missing_values_handler.exact)
+            show_png(run_in_background("impute_preview", key, draw_preview, missing_values_handler.impute_plot_preview,
+                                       selected_col, selected_method, text="Drawing the imputation preview..."))
         else:
             st.info("No preview available for dropping.")
     return selected_col, selected_method
@@ -119,7 +124,9 @@ def build_encoding_current_status(categorical_encoding_handler: CategoricalEncod
     # encoding preview
     if selected_col != 'None' and selected_method != 'None':
         col1, col2 = st.columns(2)
-        before, after = categorical_encoding_handler.preview_encoding(selected_col, selected_method, mapping)
+        key = preview_key(data, selected_col, selected_method, None if mapping is None else tuple(mapping.items()))
+        before, after = run_in_background("encoding_preview", key, compute, categorical_encoding_handler.preview_encoding,
+                                          selected_col, selected_method, mapping, text="Encoding the preview...")
         with col1:
             st.dataframe(before)
         with col2:
@@ -127,10 +134,10 @@ def build_encoding_current_status(categorical_encoding_handler: CategoricalEncod
         
     return selected_col, selected_method, mapping
 
-def numerical_handler(data):
+def numerical_handler(data, exact=True):
     st.markdown("## Numerical Features")
     st.write("Let's perform some numerical feature engineering tasks. Choose a numerical column and decide what to perform.")
-    numerical_handler = NumericalHandler(data)
+    numerical_handler = NumericalHandler(data, exact)
     selected_col, scale_method, outlier_method, transform_method, poly_method = build_numerical_current_status(numerical_handler)
     if selected_col != 'None':
         if st.button("Confirm Processing", use_container_width=True):
@@ -144,7 +151,9 @@ def build_numerical_current_status(numerical_handler: NumericalHandler):
     selected_col = st.selectbox('Select column', ['None'] + cols, key='selected_numerical_col')
     scale_method, outlier_method, transform_method, poly_method = None, None, None, None
     if selected_col != 'None':
-        stat_df = numerical_handler.summary(selected_col)
+        key = preview_key(numerical_handler.df, selected_col, numerical_handler.exact)
+        stat_df = run_in_background("numerical_summary", key, compute, numerical_handler.summary, selected_col,
+                                    text="Summarizing...")
         st.dataframe(stat_df)
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -158,9 +167,19 @@ def build_numerical_current_status(numerical_handler: NumericalHandler):
 
         # preview
         if scale_method != 'None' or outlier_method != 'None' or transform_method != 'None' or poly_method != 'Linear':
-            preview_plot = numerical_handler.preview_plot(selected_col, scale_method, outlier_method, transform_method, poly_method)
-            st.pyplot(preview_plot)
-            plt.close(preview_plot)
+            methods = (scale_method, outlier_method, transform_method, poly_method)
+            key = preview_key(numerical_handler.df, selected_col, numerical_handler.exact, *methods)
+            show_png(run_in_background("numerical_preview", key, draw_preview, numerical_handler.preview_plot,
+                                       selected_col, *methods, text="Drawing the processing preview..."))
 
     return selected_col, scale_method, outlier_method, transform_method, poly_method
-    
+
+# previews run in the background, a new selection cancels the preview of the old one
+def preview_key(data, col, *options):
+    return (col, get_fingerprint(data, col)) + options
+
+def compute(task, fn, *args):
+    return fn(*args)
+
+def draw_preview(task, make_figure, *args):
+    return render_png(lambda: make_figure(*args))
@@ -0,0 +1,16 @@
+import streamlit as st
+from module.figure_cache import FigureCache
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    return FigureCache()
+
+def show_figure(key, make_figure):
+    '''
+    Show a figure, drawing it only if it is not cached yet.
+    '''
+    show_png(get_figure_cache().render(key, make_figure))
+
+def show_png(png):
+    if png is not None:
+        st.image(png)
@@ -1,12 +1,36 @@
 import pandas as pd
 import streamlit as st
-from copy import deepcopy
+import uuid
+from module.column_profile import ProfileStore
+from module.history import DeltaHistory
+from module.EDAnalyser.AnalyserFactory import AnalyserFactory, BivariateAnalyserFactory
+from module.EDAnalyser.CorrelationEngine import CorrelationEngine
+
+# undo steps held in memory beyond this are spilled to disk
+HISTORY_MEMORY_BYTES = 1024 ** 3
     
 def init_session(df: pd.DataFrame):
     if "history" not in st.session_state:
-        st.session_state.history = []
+        st.session_state.history = DeltaHistory(max_bytes=HISTORY_MEMORY_BYTES)
     if "data" not in st.session_state:
         st.session_state.data = df.copy()
+        # keep what is already known about the loaded columns, e.g. their sketches
+        ProfileStore.of(df).carry_over(st.session_state.data, changed=())
+        # scopes the cached analysers to this dataset
+        st.session_state.dataset_id = uuid.uuid4().hex
+
+def reset_session():
+    if "dataset_id" in st.session_state:
+        AnalyserFactory.invalidate(st.session_state.dataset_id)
+        BivariateAnalyserFactory.invalidate(st.session_state.dataset_id)
+        CorrelationEngine.invalidate(st.session_state.dataset_id)
+        # imported here, page.background depends on this module
+        from page.background import get_background
+        get_background().drop_scope(st.session_state.dataset_id)
+    if "history" in st.session_state:
+        st.session_state.history.clear()
+    for key in ("history", "data", "dataset_id", "precomputed"):
+        st.session_state.pop(key, None)
 
 def get_df():
     if "data" not in st.session_state or st.session_state["data"] is None:
@@ -15,15 +39,25 @@ def get_df():
 
     return st.session_state.data
 
+def get_scope():
+    return st.session_state.get("dataset_id")
+
+def _replace_data(new_df: pd.DataFrame, changed):
+    # keep the profiles of the columns the step did not touch
+    old_df = st.session_state.data
+    ProfileStore.of(old_df).carry_over(new_df, changed)
+    AnalyserFactory.invalidate(get_scope(), changed)
+    BivariateAnalyserFactory.invalidate(get_scope(), changed)
+    st.session_state.data = new_df
+
 def confirm(new_df: pd.DataFrame, action_desc: str = ""):
-    st.session_state.history.append(
-        (deepcopy(st.session_state.data), action_desc)
-    )
-    st.session_state.data = new_df.copy()
+    new_df = new_df.copy()
+    delta = st.session_state.history.push(st.session_state.data, new_df, action_desc)
+    _replace_data(new_df, delta.touched)
 
 def undo():
     if st.session_state.history:
-        last_df, _ = st.session_state.history.pop()
-        st.session_state.data = last_df
+        last_df, delta = st.session_state.history.pop(st.session_state.data)
+        _replace_data(last_df, delta.touched)
     else:
         st.warning("No more steps to undo.")
\ No newline at end of file
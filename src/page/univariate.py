@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from page.session import get_df
+from page.session import get_df, get_scope
+from page.figures import get_figure_cache, show_figure
+from module.column_profile import get_profile
 from module.EDAnalyser.AnalyserFactory import AnalyserFactory
+from module.EDAnalyser.ParallelPrecompute import ParallelPrecompute
 from module.EDAnalyser.Univariate.DatetimeAnalyser import DatetimeAnalyser
 
 def page_univariate_eda():
@@ -29,45 +31,70 @@ def data_summary(data):
     col2.metric("Columns", f"{overview['columns']}")
     col3.metric("Missing Values", f"{overview['missing_values']}")
 
-    # Use st.tabs to show details of columns
+    # Only the selected column is analysed, so the page does not grow with the number of columns
     cols = data.columns.tolist()
-    tabs = st.tabs(cols)
-    for col_name, tab in zip(cols, tabs):
-        eda = AnalyserFactory.create(data, col_name)
-        with tab:
-            analyse = eda.analyse(overview) # type: ignore
-            dtype = analyse["dtype"]
-            st.markdown(f"""
-                **Column Information**
-                        
-                    - 📂 Data Type: {dtype}
-                    - ❓ Missing Ratio: {(analyse["missing_ratio"]):.1%}
-                """)
-            
-            ## Datetime should be treated specially due to granularity matters
-            if isinstance(eda, DatetimeAnalyser):
-                period = eda.granularity 
-                period_tabs = st.tabs(period)
-                for p, period_tab in zip(period, period_tabs):
-                    with period_tab:
-                        plot = eda.visualize_by_period(p) 
-                        st.pyplot(plot) # type: ignore
-                        plt.close(plot) # type: ignore
-            else:
-                if analyse["summary"] is not None:
-                    st.dataframe(analyse["summary"])
-                if analyse["plot"] is not None:
-                    st.pyplot(analyse["plot"])
-                    plt.close(analyse["plot"])
+    col_name = st.selectbox("📌 Column", cols, key="univariate_col")
+    if col_name is not None:
+        column_summary(data, col_name, overview)
+
+def column_summary(data, col_name, overview):
+    eda = AnalyserFactory.create(data, col_name, scope=get_scope())
+    analyse = eda.analyse(overview, visualize=False) # type: ignore
+    dtype = analyse["dtype"]
+    st.markdown(f"""
+        **Column Information**
+                
+            - 📂 Data Type: {dtype}
+            - ❓ Missing Ratio: {(analyse["missing_ratio"]):.1%}
+        """)
+
+    ## Datetime should be treated specially due to granularity matters
+    if isinstance(eda, DatetimeAnalyser):
+        period = eda.granularity
+        if period:
+            p = st.radio("Period", period, horizontal=True, key=f"univariate_period_{col_name}")
+            show_figure(eda.figure_key(p), lambda: eda.visualize_by_period(p))
+    else:
+        if analyse["summary"] is not None:
+            st.dataframe(analyse["summary"])
+        show_figure(eda.figure_key(), eda.visualize)
 
 
 def summarize_overview(df) -> dict:
     '''
     Summarize the overview of the DataFrame.
     '''
+    missing_by_column = {col: get_profile(df, col).null_count for col in df.columns}
     return {
         "rows": df.shape[0],
         "columns": df.shape[1],
-        "missing_values": df.isnull().sum().sum(),
-        "missing_by_column": df.isnull().sum().to_dict()
-    }
\ No newline at end of file
+        "missing_values": sum(missing_by_column.values()),
+        "missing_by_column": missing_by_column
+    }
+
+def precompute_univariate(data):
+    '''
+    Analyse every column of a newly loaded dataset on all cores, so that the page
+    finds the summaries and figures in the caches. Runs once per dataset.
+    '''
+    scope = get_scope()
+    if scope is None or st.session_state.get("precomputed") == scope:
+        return
+    figures = get_figure_cache()
+
+    # the analysers keep a copy of their column, they are built when the column is opened
+    def store(col, summary, pngs):
+        AnalyserFactory.put_summary(data, col, summary, scope=scope)
+        # a column without figures is cached as having none, not analysed again when opened
+        for extra, png in (pngs or {(): None}).items():
+            figures.put(AnalyserFactory.figure_key(data, col, *extra), png)
+
+    # precomputing only saves time later, a failure must not break the upload
+    st.session_state["precomputed"] = scope
+    bar = st.progress(0.0, text="Analysing columns...")
+    try:
+        ParallelPrecompute(data, dpi=figures.dpi).univariate(store, progress=lambda done: bar.progress(done, text="Analysing columns..."))
+    except Exception:
+        st.info("Columns could not be analysed ahead of time, they will be analysed when opened.")
+    finally:
+        bar.empty()
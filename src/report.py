@@ -0,0 +1,65 @@
+'''
+Headless EDA report of a data file, without the Streamlit app.
+
+    python report.py data.csv --html report.html --json report.json --pair price area --top-pairs 10
+'''
+import argparse
+import sys
+import matplotlib
+matplotlib.use("Agg")
+from module.EDAnalyser.BatchReport import BatchReport
+
+# largest relative error accepted when storing a float column as float32, as in the app
+FLOAT32_TOLERANCE = 1e-6
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write an EDA report of a CSV, Parquet or Feather/Arrow file.")
+    parser.add_argument("source", help="the data file")
+    parser.add_argument("--html", help="write a self-contained HTML report to this path")
+    parser.add_argument("--json", help="write a JSON report to this path")
+    parser.add_argument("--no-json-figures", action="store_true", help="leave the figures out of the JSON report")
+    parser.add_argument("--columns", nargs="+", help="load only these columns")
+    parser.add_argument("--pair", nargs="+", action="append", default=[], metavar="COLUMN",
+                        help="analyse a pair of columns, COL1 COL2 [HUE]; can be repeated")
+    parser.add_argument("--top-pairs", type=int, default=0, help="also analyse the N most associated pairs")
+    parser.add_argument("--method", choices=["pearson", "spearman"], default="pearson")
+    parser.add_argument("--view", choices=["all", "clustered", "top"], default="all",
+                        help="the columns shown in the correlation heatmap")
+    parser.add_argument("--workers", type=int, help="the number of worker processes, all cores by default")
+    parser.add_argument("--dpi", type=int, default=100, help="the resolution of the figures")
+    parser.add_argument("--encode-categories", action="store_true", help="store repetitive text columns as category")
+    parser.add_argument("--downcast", action="store_true", help="store numeric columns in the narrowest type")
+    parser.add_argument("--float32", action="store_true", help="with --downcast, store floats as float32 when exact enough")
+    args = parser.parse_args(argv)
+    if not args.html and not args.json:
+        parser.error("give --html and/or --json")
+    for pair in args.pair:
+        if len(pair) not in (2, 3):
+            parser.error(f"--pair takes two columns and an optional hue, got {pair}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = BatchReport(
+        args.source,
+        columns=args.columns,
+        pairs=args.pair,
+        top_pairs=args.top_pairs,
+        method=args.method,
+        view=args.view,
+        workers=args.workers,
+        dpi=args.dpi,
+        encode_categories=args.encode_categories,
+        downcast=args.downcast,
+        float_tolerance=FLOAT32_TOLERANCE if args.downcast and args.float32 else None,
+    )
+    report.run(log=lambda message: print(message, file=sys.stderr))
+    if args.html:
+        report.to_html(args.html)
+        print(f"Wrote {args.html}", file=sys.stderr)
+    if args.json:
+        report.to_json(args.json, figures=not args.no_json_figures)
+        print(f"Wrote {args.json}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+from module.data_loader import DataLoader
+
+def write_csv(path, columns):
+    pd.DataFrame(columns).to_csv(path, index=False)
+    return path
+
+@pytest.mark.parametrize("values", [
+    ["2020-01-01"] * 600 + ["not a date"] * 400,    # dates, then text
+    ["1"] * 600 + ["007", "n/a"] * 200,             # numbers, then text
+    ["12"] * 600 + ["2020-01-01"] * 400,            # numbers, then dates
+])
+def test_chunked_load_matches_single_pass_when_the_format_changes_after_the_sample(tmp_path, values):
+    path = write_csv(tmp_path / "data.csv", {"value": values, "id": range(len(values))})
+
+    single = DataLoader(None).load_data(str(path))
+    chunked = DataLoader(None).load_data_chunked(str(path), chunksize=300, sample_rows=200)
+
+    assert dict(chunked.dtypes) == dict(single.dtypes)
+    pd.testing.assert_frame_equal(chunked, single)